@@ -0,0 +1,119 @@
+"""
+Benchmark dos relatórios do DuckDB (scrapers/utils/analytics.py) sobre um
+histórico sintético grande, lido da exportação Parquet e, se a extensão
+sqlite do DuckDB estiver disponível, direto do cache SQLite.
+
+Uso:
+    python benchmarks/analytics_bench.py --rows 2000000 --products 50000
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrapers.config import ScraperConfig
+from scrapers.utils.cache import MIGRATIONS, ScraperCache
+from scrapers.utils.analytics import PriceAnalytics
+from scrapers.utils.parquet_export import export_parquet
+
+CATEGORIES = ["Celulares e Telefones", "Informática", "Games", "Casa, Móveis e Decoração", "Esportes e Fitness"]
+
+def create_database(path: Path, rows: int, products: int) -> None:
+    """Cache no schema atual com histórico completo (modo 'full') e catálogo"""
+    conn = sqlite3.connect(path)
+    for _, statements in MIGRATIONS:
+        for statement in statements:
+            conn.execute(statement)
+
+    rng = random.Random(42)
+    base = {i: round(rng.uniform(20, 5000), 2) for i in range(products)}
+
+    batch = []
+    for _ in range(rows):
+        item = rng.randrange(products)
+        price = round(base[item] * rng.uniform(0.7, 1.1), 2)
+        batch.append((f"MLB{1000000 + item}", f"Produto {item}", price, round(base[item] * 1.3, 2),
+                      f"https://produto.mercadolivre.com.br/MLB-{1000000 + item}",
+                      f"-{rng.randrange(120 * 24 * 60)} minutes"))
+        if len(batch) == 50000:
+            conn.executemany("""
+                INSERT INTO product_history (product_id, name, price, original_price, url, scraped_at)
+                VALUES (?, ?, ?, ?, ?, datetime('now', ?))
+            """, batch)
+            batch = []
+    if batch:
+        conn.executemany("""
+            INSERT INTO product_history (product_id, name, price, original_price, url, scraped_at)
+            VALUES (?, ?, ?, ?, ?, datetime('now', ?))
+        """, batch)
+
+    conn.executemany("""
+        INSERT INTO products (product_id, name, price, original_price, discount_percentage, category, url,
+                              first_seen, last_seen)
+        VALUES (?, ?, ?, ?, 0, ?, ?, datetime('now', '-120 days'), datetime('now'))
+    """, [
+        (f"MLB{1000000 + i}", f"Produto {i}", round(price * rng.uniform(0.75, 1.0), 2), round(price * 1.3, 2),
+         CATEGORIES[i % len(CATEGORIES)], f"https://produto.mercadolivre.com.br/MLB-{1000000 + i}")
+        for i, price in base.items()
+    ])
+    conn.commit()
+    conn.close()
+
+def run_reports(label: str, **source) -> None:
+    try:
+        with PriceAnalytics(**source) as analytics:
+            reports = analytics.run_all()
+    except RuntimeError as e:
+        print(f"   {label}: indisponível ({str(e).splitlines()[0]})")
+        return
+
+    total = sum(report['seconds'] for report in reports.values())
+    print(f"   {label}: {total * 1000:8.0f} ms no total")
+    for name, report in reports.items():
+        print(f"      {name:<32} {report['seconds'] * 1000:8.0f} ms  ({len(report['rows'])} linhas)")
+
+def sqlite_baseline(path: Path) -> float:
+    """Estatísticas da janela de 30 dias como o cache calcula (get_price_stats com days),
+    base dos descontos reais de analyze_discounts"""
+    conn = sqlite3.connect(path)
+    t = time.perf_counter()
+    conn.execute(ScraperCache._windowed_stats_query(), (None, "-30 days")).fetchall()
+    elapsed = time.perf_counter() - t
+    conn.close()
+    return elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--products', type=int, default=50_000)
+    args = parser.parse_args()
+    ScraperConfig.HISTORY_MODE = 'full'  # Histórico sintético com uma linha por coleta
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "scraper_cache.db"
+        parquet_dir = Path(tmp) / "parquet"
+
+        t = time.perf_counter()
+        create_database(db_path, args.rows, args.products)
+        print(f"🗄️ {args.rows} linhas de histórico, {args.products} produtos "
+              f"({db_path.stat().st_size / 1024 / 1024:.0f} MB) em {time.perf_counter() - t:.1f}s")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = export_parquet(str(db_path), str(parquet_dir))
+        print(f"📦 Exportação Parquet: {report['bytes'] / 1024 / 1024:.0f} MB em {report['seconds']:.1f}s")
+
+        print(f"\n🐢 SQLite (estatísticas ponderadas, 30 dias): {sqlite_baseline(db_path) * 1000:.0f} ms")
+        print("\n🦆 DuckDB")
+        run_reports("Parquet", parquet_dir=str(parquet_dir))
+        run_reports("SQLite anexado", db_path=str(db_path))
+
+if __name__ == '__main__':
+    main()
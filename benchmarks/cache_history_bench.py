@@ -0,0 +1,159 @@
+"""
+Benchmark do schema do cache: consultas de histórico e upsert de seletores
+antes e depois da migração de índices (versão 2).
+
+Uso:
+    python benchmarks/cache_history_bench.py --rows 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrapers.utils.cache import ScraperCache, MIGRATIONS
+from scrapers.utils.timing import percentile
+
+HISTORY_QUERY = """
+    SELECT name, price, original_price, scraped_at
+    FROM product_history
+    WHERE product_id = ? AND scraped_at > datetime('now', '-30 days')
+    ORDER BY scraped_at DESC
+"""
+
+def create_v1_database(path: Path, rows: int, products: int) -> None:
+    """Banco no schema antigo (sem índices) com histórico sintético"""
+    conn = sqlite3.connect(path)
+    for statement in dict(MIGRATIONS)[1]:
+        conn.execute(statement)
+    conn.execute("PRAGMA user_version=1")
+
+    rng = random.Random(42)
+    batch = []
+    for i in range(rows):
+        product = rng.randrange(products)
+        price = round(rng.uniform(10, 5000), 2)
+        batch.append((
+            f"MLB{1000000 + product}",
+            f"Produto {product}",
+            price,
+            price * 1.2,
+            f"https://produto.mercadolivre.com.br/MLB-{1000000 + product}",
+            f"-{rng.randrange(90 * 24 * 60)} minutes"
+        ))
+        if len(batch) >= 50_000:
+            _insert(conn, batch)
+            batch = []
+    if batch:
+        _insert(conn, batch)
+
+    conn.commit()
+    conn.close()
+
+def _insert(conn: sqlite3.Connection, batch) -> None:
+    conn.executemany("""
+        INSERT INTO product_history (product_id, name, price, original_price, url, scraped_at)
+        VALUES (?, ?, ?, ?, ?, datetime('now', ?))
+    """, batch)
+
+def time_history_queries(path: Path, product_ids, label: str) -> None:
+    """Latência da consulta de histórico por produto"""
+    conn = sqlite3.connect(path)
+    samples = []
+    for product_id in product_ids:
+        start = time.perf_counter()
+        conn.execute(HISTORY_QUERY, (product_id,)).fetchall()
+        samples.append(time.perf_counter() - start)
+    conn.close()
+    report(label, samples)
+
+def time_legacy_selector_updates(path: Path, updates) -> None:
+    """SELECT seguido de UPDATE/INSERT (comportamento antigo)"""
+    conn = sqlite3.connect(path)
+    samples = []
+    for selector, selector_type, success in updates:
+        start = time.perf_counter()
+        row = conn.execute("""
+            SELECT success_count, total_attempts FROM selector_performance
+            WHERE selector = ? AND selector_type = ?
+        """, (selector, selector_type)).fetchone()
+        if row:
+            conn.execute("""
+                UPDATE selector_performance
+                SET success_count = ?, total_attempts = ?, last_used = datetime('now')
+                WHERE selector = ? AND selector_type = ?
+            """, (row[0] + success, row[1] + 1, selector, selector_type))
+        else:
+            conn.execute("""
+                INSERT INTO selector_performance (selector, selector_type, success_count, total_attempts)
+                VALUES (?, ?, ?, 1)
+            """, (selector, selector_type, success))
+        conn.commit()
+        samples.append(time.perf_counter() - start)
+    conn.close()
+    report("seletores v1 (select+update)", samples)
+
+async def run_cache_phase(path: Path, product_ids, updates) -> None:
+    """Migração, consultas e upserts através do ScraperCache"""
+    cache = ScraperCache(str(path))
+    start = time.perf_counter()
+    await cache.initialize()
+    print(f"   migração para v{MIGRATIONS[-1][0]}: {time.perf_counter() - start:.2f}s")
+
+    samples = []
+    for product_id in product_ids:
+        t0 = time.perf_counter()
+        await cache.get_price_history(product_id, 30)
+        samples.append(time.perf_counter() - t0)
+    report("histórico via ScraperCache", samples)
+
+    samples = []
+    for selector, selector_type, success in updates:
+        t0 = time.perf_counter()
+        await cache.update_selector_performance(selector, selector_type, bool(success))
+        samples.append(time.perf_counter() - t0)
+    report("seletores via upsert", samples)
+
+    await cache.close()
+
+def report(label: str, samples) -> None:
+    print(f"   {label:<32} n={len(samples):<5} "
+          f"média={statistics.mean(samples) * 1000:8.3f}ms "
+          f"p50={percentile(samples, 50) * 1000:8.3f}ms "
+          f"p95={percentile(samples, 95) * 1000:8.3f}ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do schema do cache")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="linhas de histórico")
+    parser.add_argument('--products', type=int, default=20_000, help="produtos distintos")
+    parser.add_argument('--queries', type=int, default=200, help="consultas por fase")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    product_ids = [f"MLB{1000000 + rng.randrange(args.products)}" for _ in range(args.queries)]
+    updates = [(f".seletor-{rng.randrange(50)}", rng.choice(['title', 'price', 'link']), rng.randrange(2))
+               for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench_cache.db"
+
+        start = time.perf_counter()
+        create_v1_database(path, args.rows, args.products)
+        print(f"📦 {args.rows} linhas geradas em {time.perf_counter() - start:.1f}s")
+
+        print("🐢 Schema v1 (sem índices):")
+        time_history_queries(path, product_ids, "histórico v1 (full scan)")
+        time_legacy_selector_updates(path, updates)
+
+        print("🚀 Schema atual:")
+        asyncio.run(run_cache_phase(path, product_ids, updates))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Teste de carga do cache compartilhado entre processos: N processos fazendo
+leituras e escritas misturadas no mesmo arquivo SQLite.
+
+Uso:
+    python benchmarks/cache_multiprocess_bench.py --processes 8 --seconds 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrapers.config import ScraperConfig
+from scrapers.utils.cache import ScraperCache
+from scrapers.utils.cache_metrics import get_cache_metrics
+from scrapers.utils.memory_cache import MemoryLRU
+from scrapers.utils.timing import percentile
+from scrapers.utils.validators import Product
+
+def make_products(rng: random.Random, count: int):
+    """Página sintética de resultados"""
+    products = []
+    for _ in range(count):
+        item = rng.randrange(100000)
+        price = round(rng.uniform(10, 5000), 2)
+        products.append(Product(
+            name=f"Produto {item}",
+            price=price,
+            original_price=round(price * 1.2, 2),
+            url=f"https://produto.mercadolivre.com.br/MLB-{1000000 + item}",
+            product_id=f"MLB{1000000 + item}"
+        ))
+    return products
+
+async def worker_loop(db_path: str, seed: int, seconds: float, tasks: int, read_ratio: float, terms: int) -> dict:
+    """Tarefas concorrentes num processo, cada uma escolhendo leitura ou escrita"""
+    result = {'reads': [], 'writes': [], 'exceptions': 0}
+    search_metrics = get_cache_metrics('search')
+    errors_before = search_metrics.errors
+
+    async with ScraperCache(db_path) as cache:
+        # Sem a camada em memória: toda leitura vai ao SQLite
+        cache.memory = MemoryLRU(1, 0, 0)
+        deadline = time.perf_counter() + seconds
+
+        async def run(task: int) -> None:
+            rng = random.Random(seed * 1000 + task)
+            while time.perf_counter() < deadline:
+                params = {'term': f"termo {rng.randrange(terms)}"}
+                started = time.perf_counter()
+                try:
+                    if rng.random() < read_ratio:
+                        await cache.get_cached_entry('term', params)
+                        result['reads'].append(time.perf_counter() - started)
+                    else:
+                        products = make_products(rng, 20)
+                        await cache.cache_search_results('term', params, products)
+                        await cache.save_product_history(products)
+                        result['writes'].append(time.perf_counter() - started)
+                except Exception:
+                    result['exceptions'] += 1
+
+        await asyncio.gather(*(run(task) for task in range(tasks)))
+        result['lock_waits'] = list(cache._writer.lock_waits)
+        result['transactions'] = cache._writer.transactions
+        result['busy_retries'] = cache.busy_retries
+
+    # O cache captura e só imprime os próprios erros: contar pelas métricas
+    result['search_errors'] = search_metrics.errors - errors_before
+    return result
+
+def worker(db_path: str, seed: int, seconds: float, tasks: int, read_ratio: float, terms: int,
+           busy_timeout_ms: int, busy_retries: int, queue) -> None:
+    """Processo do teste: a saída do cache é capturada e os avisos de erro
+    (toda exceção engolida pelo cache imprime uma linha ⚠️/❌) voltam no resultado"""
+    ScraperConfig.CACHE_BUSY_TIMEOUT_MS = busy_timeout_ms
+    ScraperConfig.CACHE_BUSY_RETRIES = busy_retries
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            result = asyncio.run(worker_loop(db_path, seed, seconds, tasks, read_ratio, terms))
+    except Exception as e:
+        # Processo que não conseguiu nem abrir o cache conta como falha (e não trava o teste)
+        result = {'reads': [], 'writes': [], 'exceptions': 0, 'lock_waits': [], 'transactions': 0,
+                  'busy_retries': 0, 'search_errors': 0, 'failed': f"{type(e).__name__}: {e}"}
+    result['warnings'] = [line for line in output.getvalue().splitlines() if line.startswith(('⚠️', '❌'))]
+    queue.put(result)
+
+def format_latencies(label: str, samples) -> str:
+    ms = [value * 1000 for value in samples]
+    return (f"   {label:<12} p50 {percentile(ms, 50):7.2f} ms | p95 {percentile(ms, 95):7.2f} ms | "
+            f"p99 {percentile(ms, 99):7.2f} ms | máx {max(ms) if ms else 0:7.2f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--tasks', type=int, default=4, help="Tarefas concorrentes por processo")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--read-ratio', type=float, default=0.8)
+    parser.add_argument('--terms', type=int, default=200)
+    parser.add_argument('--busy-timeout-ms', type=int, default=ScraperConfig.CACHE_BUSY_TIMEOUT_MS,
+                        help="busy_timeout de cada conexão (0 expõe a disputa pelo lock)")
+    parser.add_argument('--busy-retries', type=int, default=ScraperConfig.CACHE_BUSY_RETRIES,
+                        help="Retentativas após SQLITE_BUSY (0 mostra os erros sem o backoff)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "scraper_cache.db")
+
+        # Schema criado antes, para medir só a carga (a migração concorrente também é segura)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            async def prepare():
+                async with ScraperCache(db_path):
+                    pass
+            asyncio.run(prepare())
+
+        context = multiprocessing.get_context('spawn')
+        queue = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(db_path, seed, args.seconds, args.tasks,
+                                                 args.read_ratio, args.terms, args.busy_timeout_ms,
+                                                 args.busy_retries, queue))
+            for seed in range(args.processes)
+        ]
+
+        print(f"🔥 {args.processes} processos x {args.tasks} tarefas por {args.seconds:.0f}s "
+              f"({args.read_ratio:.0%} leituras)")
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+    reads = [value for result in results for value in result['reads']]
+    writes = [value for result in results for value in result['writes']]
+    lock_waits = [value for result in results for value in result['lock_waits']]
+    warnings = [line for result in results for line in result['warnings']]
+    # Cada erro engolido imprime um aviso; erros de leitura/escrita de busca também entram nas métricas
+    failed = [result['failed'] for result in results if 'failed' in result]
+    errors = len(warnings) + sum(result['exceptions'] for result in results) + len(failed)
+
+    print(f"   Leituras: {len(reads)} ({len(reads) / elapsed:.0f}/s) | "
+          f"Escritas: {len(writes)} ({len(writes) / elapsed:.0f}/s) | "
+          f"Erros: {errors}")
+    print(f"   Erros por origem: {sum(result['search_errors'] for result in results)} no cache de busca "
+          f"(métricas) | {len(warnings)} avisos impressos pelo cache | "
+          f"{sum(result['exceptions'] for result in results)} exceções propagadas")
+    for line, count in Counter(warnings + failed).most_common(5):
+        print(f"      {count}x {line}")
+    if failed:
+        print(f"   ❌ {len(failed)} de {args.processes} processos falharam ao abrir o cache")
+    print(f"   Transações: {sum(result['transactions'] for result in results)} | "
+          f"Retentativas por busy: {sum(result['busy_retries'] for result in results)}")
+    print(format_latencies("leitura", reads))
+    print(format_latencies("escrita", writes))
+    print(format_latencies("lock wait", lock_waits))
+
+if __name__ == '__main__':
+    main()
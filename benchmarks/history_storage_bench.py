@@ -0,0 +1,95 @@
+"""
+Benchmark de armazenamento do histórico de preços: uma linha por coleta
+(HISTORY_MODE = 'full') contra só mudanças (HISTORY_MODE = 'changes').
+
+Simula coletas horárias dos mesmos produtos com poucas mudanças de preço.
+
+Uso:
+    python benchmarks/history_storage_bench.py --products 500 --days 30
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrapers.config import ScraperConfig
+from scrapers.utils.cache import ScraperCache
+from scrapers.utils.validators import Product
+
+def build_catalog(count: int):
+    rng = random.Random(1)
+    return [
+        Product(
+            name=f"Produto de teste {i}",
+            price=round(rng.uniform(20, 3000), 2),
+            url=f"https://produto.mercadolivre.com.br/MLB-{2000000 + i}-produto",
+            product_id=f"MLB{2000000 + i}",
+        )
+        for i in range(count)
+    ]
+
+async def simulate(path: Path, mode: str, catalog, hours: int, change_rate: float) -> dict:
+    """Rodar todas as coletas em um banco novo e medir tamanho e tempo"""
+    ScraperConfig.HISTORY_MODE = mode
+    rng = random.Random(2)
+    products = list(catalog)
+    start_at = datetime.now(timezone.utc) - timedelta(hours=hours)
+
+    cache = ScraperCache(str(path))
+    await cache.initialize()
+
+    started = time.perf_counter()
+    for hour in range(hours):
+        for i, product in enumerate(products):
+            if rng.random() < change_rate:
+                products[i] = product.model_copy(update={'price': round(product.price * rng.uniform(0.9, 1.1), 2)})
+
+        observed_at = (start_at + timedelta(hours=hour)).strftime('%Y-%m-%d %H:%M:%S')
+        await cache.save_product_history(products, observed_at=observed_at)
+    elapsed = time.perf_counter() - started
+
+    history = await cache.get_price_history(products[0].product_id, days=hours // 24 + 1)
+    await cache.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    rows = conn.execute("SELECT (SELECT COUNT(*) FROM product_history) + (SELECT COUNT(*) FROM price_points)").fetchone()[0]
+    conn.close()
+
+    return {'mode': mode, 'rows': rows, 'bytes': path.stat().st_size,
+            'seconds': elapsed, 'series': len(history)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de armazenamento do histórico")
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--change-rate', type=float, default=0.02, help="chance de mudança de preço por coleta")
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.products)
+    hours = args.days * 24
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('full', 'changes'):
+            results.append(asyncio.run(simulate(Path(tmp) / f"{mode}.db", mode, catalog, hours, args.change_rate)))
+
+    print(f"\n📦 {args.products} produtos, {hours} coletas horárias, {args.change_rate:.0%} de mudança por coleta")
+    for result in results:
+        print(f"   {result['mode']:<8} linhas={result['rows']:<8} "
+              f"tamanho={result['bytes'] / 1024 / 1024:7.2f} MB "
+              f"gravação={result['seconds']:6.1f}s pontos na série={result['series']}")
+
+    full, changes = results
+    print(f"   redução: {full['bytes'] / changes['bytes']:.1f}x em disco, {full['rows'] / changes['rows']:.1f}x em linhas")
+
+if __name__ == "__main__":
+    main()
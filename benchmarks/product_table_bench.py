@@ -0,0 +1,131 @@
+"""
+Benchmark de memória e filtros: lista de Products (como era
+MercadoLivreScraper.products) contra o ProductTable colunar.
+
+Uso:
+    python benchmarks/product_table_bench.py --products 100000
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import TREE_FIELDS
+from scrapers.utils.product_table import ProductTable
+from scrapers.utils.validators import Product
+
+CATEGORIES = ["Celulares e Telefones", "Informática", "Games", "Casa, Móveis e Decoração", "Esportes e Fitness", None]
+
+def build_products(count: int):
+    """Produtos no formato dos resultados de busca (validados uma vez)"""
+    rng = random.Random(3)
+    started = datetime(2026, 10, 1, 12, 0, 0)
+    products = []
+    for i in range(count):
+        price = round(rng.uniform(20, 3000), 2)
+        products.append(Product.from_trusted({
+            'name': f"Produto de busca {i} com nome comprido como os do Mercado Livre",
+            'price': price,
+            'original_price': round(price * 1.2, 2) if i % 3 else None,
+            'discount_percentage': 16.67 if i % 3 else 0.0,
+            'url': f"https://produto.mercadolivre.com.br/MLB-{4000000 + i}-produto-de-busca-_JM",
+            'image_url': f"https://http2.mlstatic.com/D_NQ_NP_{4000000 + i}-O.webp",
+            'seller': None,
+            'rating': round(rng.uniform(3, 5), 1) if i % 2 else None,
+            'reviews_count': rng.randrange(500) if i % 2 else None,
+            'is_promotion': bool(i % 3),
+            'free_shipping': bool(i % 2),
+            'product_id': f"MLB{4000000 + i}",
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'category_confidence': 0.8,
+            'scraped_at': started + timedelta(seconds=i),
+        }))
+    return products
+
+def measure_memory(build) -> tuple:
+    """(objeto, bytes alocados) medidos com tracemalloc"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+def timed(function, repeat: int = 3) -> tuple:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def list_filter(products, min_price, max_price, category):
+    """Laço de apply_filters antes do ProductTable"""
+    filtered = []
+    for product in products:
+        if min_price and product.price and product.price < min_price:
+            continue
+        if max_price and product.price and product.price > max_price:
+            continue
+        if category is not None and product.category != category:
+            continue
+        filtered.append(product)
+    return filtered
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100000)
+    args = parser.parse_args()
+
+    mb = 1024 * 1024
+    products, list_bytes = measure_memory(lambda: build_products(args.products))
+    table, table_bytes = measure_memory(lambda: ProductTable(products))
+    print(f"🧠 {args.products} produtos")
+    print(f"   Lista de Product  {list_bytes / mb:8.1f} MB")
+    print(f"   ProductTable      {table_bytes / mb:8.1f} MB  ({table.nbytes() / mb:.1f} MB nas colunas, "
+          f"{table_bytes / list_bytes:.0%} da lista)")
+
+    assert list(table) == products
+
+    # apply_filters de ponta a ponta: filtro + campos que a tabela da GUI formata
+    # (o custo de inserir no Treeview é o mesmo nos dois casos e fica de fora)
+    print("\n🔎 apply_filters (faixa de preço + categoria, até os valores da tela)")
+    criteria = (500.0, 1500.0, "Games")
+
+    def list_path():
+        return [tuple(getattr(product, field) for field in TREE_FIELDS)
+                for product in list_filter(products, *criteria)]
+
+    def table_path():
+        return list(table.select(TREE_FIELDS, table.filter(*criteria)))
+
+    expected, list_seconds = timed(list_path)
+    rows, scan_seconds = timed(lambda: table.filter(*criteria))
+    values, table_seconds = timed(table_path)
+    selected, take_seconds = timed(lambda: table.take(rows))
+    assert values == expected
+    assert selected == list_filter(products, *criteria)
+    print(f"   Lista de Product  {list_seconds * 1000:8.1f} ms")
+    print(f"   ProductTable      {table_seconds * 1000:8.1f} ms ({scan_seconds * 1000:.1f} ms de varredura, "
+          f"{len(rows)} linhas)")
+    print(f"   take() (Products) {take_seconds * 1000:8.1f} ms  (só para quem precisa do objeto)")
+
+    print("\n🔁 Tabela inteira (exportações)")
+    export_fields = TREE_FIELDS + ("is_promotion", "category_confidence")
+    _, list_seconds = timed(lambda: [tuple(getattr(product, field) for field in export_fields)
+                                     for product in products], repeat=1)
+    _, select_seconds = timed(lambda: list(table.select(export_fields)), repeat=1)
+    _, iterate_seconds = timed(lambda: sum(1 for _ in table), repeat=1)
+    print(f"   Lista de Product  {list_seconds * 1000:8.0f} ms")
+    print(f"   select (colunas)  {select_seconds * 1000:8.0f} ms")
+    print(f"   Iterar Products   {iterate_seconds * 1000:8.0f} ms  (views sob demanda)")
+
+if __name__ == '__main__':
+    main()
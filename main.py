@@ -4,36 +4,71 @@ Interface Gráfica para Mercado Livre Scraper
 Tkinter GUI simples e limpa
 """
 
+import time
+_STARTUP_T0 = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import argparse
 import asyncio
+import importlib
+import sys
 import threading
 from datetime import datetime
 import json
 import os
 import webbrowser
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 
-# Imports do sistema
-from scrapers.engines.playwright_engine import PlaywrightEngine
-from scrapers.utils.validators import Product
+# Imports do sistema - apenas módulos leves no carregamento da janela.
+# Playwright, BeautifulSoup, pydantic e rich são importados sob demanda
+# nas threads de busca/afiliados.
 from scrapers.config import ScraperConfig
-from scrapers.affiliate_manager import AffiliateManager
+from scrapers.utils.timing import PhaseTimer
+from scrapers.utils.tracing import get_tracer, enable_tracing
+from scrapers.utils.profiler import SamplingProfiler, profile_output_path
+from scrapers.utils.cache_metrics import CacheMetricsLogger
+from scrapers.utils.product_table import ProductTable
+
+if TYPE_CHECKING:
+    from scrapers.utils.validators import Product
+
+_IMPORTS_DONE = time.perf_counter()
+
+# Módulos pesados que não devem ser carregados antes da janela aparecer
+HEAVY_MODULES = [
+    "fake_useragent",
+    "pydantic",
+    "bs4",
+    "playwright.async_api",
+    "rich",
+    "scrapers.utils.validators",
+    "scrapers.engines.playwright_engine",
+    "scrapers.affiliate_manager",
+    "scrapers.utils.cache",
+    "aiosqlite",
+    "pandas",
+]
+
+# Campos exibidos na tabela de resultados (ordem dos parâmetros de _insert_tree_row)
+TREE_FIELDS = ("name", "category", "price", "original_price", "discount_percentage", "free_shipping", "url")
 
 class MercadoLivreScraper:
     """Interface gráfica principal para o scraper"""
     
-    def __init__(self):
+    def __init__(self, profile_runs: bool = False):
         self.root = tk.Tk()
         self.root.title("🛒 Mercado Livre Scraper v2.0")
         self.root.geometry("1000x700")
         self.root.configure(bg="#f0f0f0")
         
         # Variáveis
-        self.products: List[Product] = []
+        self.products = ProductTable()  # Colunar: muitos resultados sem um objeto pydantic por produto
         self.config = ScraperConfig()
         self.is_scraping = False
         self.product_urls = {}  # Mapear item_id -> URL dos produtos
+        self.profile_runs = profile_runs  # Profiler por amostragem em cada busca/execução
+        self.cache_metrics_logger = CacheMetricsLogger()  # Linha periódica com hit ratio dos caches
         
         # Setup da interface
         self.setup_ui()
@@ -268,35 +303,39 @@ class MercadoLivreScraper:
         for widget in [self.search_btn, self.category_btn, self.offers_btn]:
             widget.configure(state="normal")
     
-    def add_products_to_tree(self, products: List[Product]):
+    def add_products_to_tree(self, products: List["Product"]):
         """Adicionar produtos à tabela"""
         for product in products:
-            # Formatação dos dados
-            nome = product.name[:50] + "..." if len(product.name) > 50 else product.name
-            categoria = product.category or "Indefinido"
-            
-            # Formatação de preço (de/por)
-            if product.original_price and product.original_price > product.price:
-                # Mostrar: "De R$ 899,00 → R$ 599,00"
-                preco_original = f"R$ {product.original_price:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                preco_atual = f"R$ {product.price:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-                preco = f"De {preco_original} → {preco_atual}"
-            else:
-                # Só preço atual
-                preco = f"R$ {product.price:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if product.price else "N/A"
-            
-            desconto = f"{product.discount_percentage:.0f}%" if product.discount_percentage > 0 else "-"
-            frete = "✅ Sim" if product.free_shipping else "❌ Não"
-            
-            # Link - botão clicável
-            link_display = "📋 Copiar" if product.url else "N/A"
-            
-            # Inserir na tree
-            item_id = self.tree.insert("", "end", values=(nome, categoria, preco, desconto, frete, link_display))
-            
-            # Armazenar URL no dicionário para acesso posterior
-            if product.url:
-                self.product_urls[item_id] = product.url
+            self._insert_tree_row(*(getattr(product, field) for field in TREE_FIELDS))
+    
+    def _insert_tree_row(self, name, category, price, original_price, discount_percentage, free_shipping, url):
+        """Formatar e inserir uma linha (campos na ordem de TREE_FIELDS)"""
+        # Formatação dos dados
+        nome = name[:50] + "..." if len(name) > 50 else name
+        categoria = category or "Indefinido"
+        
+        # Formatação de preço (de/por)
+        if original_price and original_price > price:
+            # Mostrar: "De R$ 899,00 → R$ 599,00"
+            preco_original = f"R$ {original_price:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            preco_atual = f"R$ {price:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            preco = f"De {preco_original} → {preco_atual}"
+        else:
+            # Só preço atual
+            preco = f"R$ {price:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if price else "N/A"
+        
+        desconto = f"{discount_percentage:.0f}%" if discount_percentage > 0 else "-"
+        frete = "✅ Sim" if free_shipping else "❌ Não"
+        
+        # Link - botão clicável
+        link_display = "📋 Copiar" if url else "N/A"
+        
+        # Inserir na tree
+        item_id = self.tree.insert("", "end", values=(nome, categoria, preco, desconto, frete, link_display))
+        
+        # Armazenar URL no dicionário para acesso posterior
+        if url:
+            self.product_urls[item_id] = url
     
     def clear_results(self):
         """Limpar resultados"""
@@ -403,7 +442,7 @@ class MercadoLivreScraper:
         
         # Executar busca em thread separada
         thread = threading.Thread(
-            target=self._run_search,
+            target=self._profiled(self._run_search, "busca"),
             args=(search_term, quantity, "term")
         )
         thread.daemon = True
@@ -477,7 +516,7 @@ class MercadoLivreScraper:
             
             # Executar busca para múltiplas categorias
             thread = threading.Thread(
-                target=self._run_search,
+                target=self._profiled(self._run_search, "busca"),
                 args=(selected_categories, quantity, "categories")
             )
             thread.daemon = True
@@ -493,15 +532,30 @@ class MercadoLivreScraper:
         quantity = int(self.quantity_var.get())
         
         thread = threading.Thread(
-            target=self._run_search,
+            target=self._profiled(self._run_search, "busca"),
             args=("", quantity, "offers")
         )
         thread.daemon = True
         thread.start()
     
+    def _profiled(self, target, kind: str):
+        """Envolver o alvo da thread no profiler por amostragem, se ativado"""
+        if not self.profile_runs:
+            return target
+        
+        def run(*args):
+            with SamplingProfiler(profile_output_path(kind)):
+                target(*args)
+        
+        return run
+    
     def _run_search(self, term, quantity: int, search_type: str):
         """Executar busca (roda em thread separada)"""
+        progress_stopped = False
         try:
+            from scrapers.engines.playwright_engine import PlaywrightEngine
+            from scrapers.utils.cache import ScraperCache
+            
             # Atualizar UI
             self.root.after(0, self.start_progress, quantity)
             self.root.after(0, self.update_status, f"Iniciando busca...")
@@ -515,59 +569,85 @@ class MercadoLivreScraper:
             asyncio.set_event_loop(loop)
             
             async def search():
-                async with PlaywrightEngine() as engine:
-                    if search_type == "term":
-                        if hasattr(engine, 'search_products_with_progress'):
-                            return await engine.search_products_with_progress(term, quantity, progress_callback)
-                        else:
-                            return await engine.search_products(term, quantity)
-                    elif search_type == "category":
-                        if hasattr(engine, 'search_category_with_progress'):
-                            return await engine.search_category_with_progress(term, quantity, progress_callback)
-                        else:
-                            return await engine.search_category(term, quantity)
-                    elif search_type == "categories":
-                        # Busca por múltiplas categorias
-                        all_products = []
-                        for i, category in enumerate(term):
-                            self.root.after(0, self.update_status, f"Buscando categoria {i+1}/{len(term)}: {category}")
-                            if hasattr(engine, 'search_category_with_progress'):
-                                category_products = await engine.search_category_with_progress(
-                                    category, quantity // len(term), progress_callback
-                                )
-                            else:
-                                category_products = await engine.search_category(category, quantity // len(term))
-                            if category_products:
-                                all_products.extend(category_products)
-                        return all_products
-                    elif search_type == "offers":
-                        if hasattr(engine, 'search_offers_with_progress'):
-                            return await engine.search_offers_with_progress(quantity, progress_callback)
-                        else:
-                            return await engine.search_offers(quantity)
+                nonlocal progress_stopped
+                async with ScraperCache() as cache:
+                    # Browser só é aberto se alguma parte da busca não estiver no cache
+                    engine = PlaywrightEngine(cache=cache)
+                    try:
+                        products = await self._search_with_engine(engine, term, quantity, search_type, progress_callback)
+                        # Tempo por fase acumulado da engine (todas as buscas desta execução)
+                        self._show_search_results(products, search_type, engine.session_timings.summary())
+                        self.root.after(0, self.stop_progress)
+                        progress_stopped = True
+                    finally:
+                        # Aguarda atualizações do cache em segundo plano, com resultados já na tela
+                        await engine.close()
+                    
+                    # Entre buscas: limpeza em lotes curtos do cache, se já estiver na hora
+                    # (sem VACUUM completo, que fica para main.py --vacuum)
+                    await cache.run_retention_if_due()
             
-            products = loop.run_until_complete(search())
+            loop.run_until_complete(search())
             loop.close()
             
-            # Atualizar UI com resultados
-            if products:
-                self.products.extend(products)
-                self.root.after(0, self.add_products_to_tree, products)
-                
-                # Salvar automaticamente
-                self.root.after(0, self._auto_save_products, products, search_type)
-                
-                self.root.after(0, self.update_status, f"✅ Concluído! {len(products)} produtos encontrados e salvos")
-            else:
-                self.root.after(0, self.update_status, "❌ Nenhum produto encontrado")
-                self.root.after(0, messagebox.showinfo, "Resultado", "Nenhum produto encontrado")
-            
         except Exception as e:
             self.root.after(0, self.update_status, f"❌ Erro: {str(e)}")
             self.root.after(0, messagebox.showerror, "Erro", f"Erro ao buscar produtos:\n{str(e)}")
         
         finally:
-            self.root.after(0, self.stop_progress)
+            get_tracer().flush()
+            if not progress_stopped:
+                self.root.after(0, self.stop_progress)
+    
+    def _show_search_results(self, products: List["Product"], search_type: str, timing_summary: Dict[str, Any]):
+        """Levar resultados da busca para a interface (chamado da thread da busca)"""
+        timing_status = PhaseTimer.format_status(timing_summary)
+        timing_suffix = f" | {timing_status}" if timing_status else ""
+        
+        if products:
+            # A tabela só é alterada na thread do Tk (filtros e exportações leem dela)
+            self.root.after(0, self.products.extend, products)
+            self.root.after(0, self.add_products_to_tree, products)
+            
+            # Salvar automaticamente
+            self.root.after(0, self._auto_save_products, products, search_type)
+            
+            self.root.after(0, self.update_status, f"✅ Concluído! {len(products)} produtos encontrados e salvos{timing_suffix}")
+        else:
+            self.root.after(0, self.update_status, f"❌ Nenhum produto encontrado{timing_suffix}")
+            self.root.after(0, messagebox.showinfo, "Resultado", "Nenhum produto encontrado")
+    
+    async def _search_with_engine(self, engine, term, quantity: int, search_type: str, progress_callback):
+        """Executar o tipo de busca escolhido na engine já iniciada"""
+        if search_type == "term":
+            if hasattr(engine, 'search_products_with_progress'):
+                return await engine.search_products_with_progress(term, quantity, progress_callback)
+            else:
+                return await engine.search_products(term, quantity)
+        elif search_type == "category":
+            if hasattr(engine, 'search_category_with_progress'):
+                return await engine.search_category_with_progress(term, quantity, progress_callback)
+            else:
+                return await engine.search_category(term, quantity)
+        elif search_type == "categories":
+            # Busca por múltiplas categorias
+            all_products = []
+            for i, category in enumerate(term):
+                self.root.after(0, self.update_status, f"Buscando categoria {i+1}/{len(term)}: {category}")
+                if hasattr(engine, 'search_category_with_progress'):
+                    category_products = await engine.search_category_with_progress(
+                        category, quantity // len(term), progress_callback
+                    )
+                else:
+                    category_products = await engine.search_category(category, quantity // len(term))
+                if category_products:
+                    all_products.extend(category_products)
+            return all_products
+        elif search_type == "offers":
+            if hasattr(engine, 'search_offers_with_progress'):
+                return await engine.search_offers_with_progress(quantity, progress_callback)
+            else:
+                return await engine.search_offers(quantity)
     
     def apply_filters(self):
         """Aplicar filtros aos resultados"""
@@ -598,30 +678,21 @@ class MercadoLivreScraper:
             messagebox.showerror("Erro", "Preço máximo inválido")
             return
         
-        # Aplicar filtros
-        filtered_products = []
-        
-        for product in self.products:
-            # Filtro de preço
-            if min_price and product.price and product.price < min_price:
-                continue
-            if max_price and product.price and product.price > max_price:
-                continue
-            
-            # Filtro de categoria
-            if category_filter != "Todas":
-                if not product.category or product.category != category_filter:
-                    continue
-            
-            filtered_products.append(product)
+        # Aplicar filtros (varredura nas colunas, sem montar Product)
+        rows = self.products.filter(
+            min_price=min_price,
+            max_price=max_price,
+            category=None if category_filter == "Todas" else category_filter
+        )
         
         # Limpar e mostrar produtos filtrados
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        self.add_products_to_tree(filtered_products)
+        for values in self.products.select(TREE_FIELDS, rows):
+            self._insert_tree_row(*values)
         
-        self.update_status(f"Filtros aplicados: {len(filtered_products)} produtos encontrados")
+        self.update_status(f"Filtros aplicados: {len(rows)} produtos encontrados")
     
     def export_excel(self):
         """Exportar para Excel"""
@@ -646,18 +717,22 @@ class MercadoLivreScraper:
                 
                 # Preparar dados para DataFrame
                 data = []
-                for i, product in enumerate(self.products, 1):
+                # Campos lidos direto das colunas da tabela (sem montar um Product por linha)
+                rows = self.products.select(("name", "category", "price", "original_price", "discount_percentage",
+                                             "url", "free_shipping", "is_promotion", "category_confidence"))
+                for i, (name, category, price, original_price, discount, url, free_shipping,
+                        is_promotion, confidence) in enumerate(rows, 1):
                     data.append({
                         'Número': i,
-                        'Nome': product.name,
-                        'Categoria': product.category or 'Indefinido',
-                        'Preço': product.price,
-                        'Preço Original': product.original_price,
-                        'Desconto %': product.discount_percentage,
-                        'URL': product.url,
-                        'Frete Grátis': 'Sim' if product.free_shipping else 'Não',
-                        'Em Promoção': 'Sim' if product.is_promotion else 'Não',
-                        'Confiança Categoria': f"{product.category_confidence:.2f}"
+                        'Nome': name,
+                        'Categoria': category or 'Indefinido',
+                        'Preço': price,
+                        'Preço Original': original_price,
+                        'Desconto %': discount,
+                        'URL': url,
+                        'Frete Grátis': 'Sim' if free_shipping else 'Não',
+                        'Em Promoção': 'Sim' if is_promotion else 'Não',
+                        'Confiança Categoria': f"{confidence:.2f}"
                     })
                 
                 # Criar DataFrame e salvar
@@ -744,6 +819,7 @@ class MercadoLivreScraper:
             
             final_data = {
                 "info": {
+                    "formato": ScraperConfig.AUTO_SAVE_FORMAT,  # Reconhecido ao recarregar sem revalidar
                     "total_produtos": len(products),
                     "coletado_em": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
                     "tipo_busca": search_type,
@@ -784,17 +860,21 @@ class MercadoLivreScraper:
                     "produtos": []
                 }
                 
-                for i, product in enumerate(self.products, 1):
+                # Campos lidos direto das colunas da tabela (sem montar um Product por linha)
+                rows = self.products.select(("name", "category", "price", "original_price", "discount_percentage",
+                                             "url", "free_shipping", "is_promotion"))
+                for i, (name, category, price, original_price, discount, url, free_shipping,
+                        is_promotion) in enumerate(rows, 1):
                     export_data["produtos"].append({
                         "numero": i,
-                        "nome": product.name,
-                        "categoria": product.category,
-                        "preco": product.price,
-                        "preco_original": product.original_price,
-                        "desconto_percentual": product.discount_percentage,
-                        "url": product.url,
-                        "frete_gratis": product.free_shipping,
-                        "em_promocao": product.is_promotion
+                        "nome": name,
+                        "categoria": category,
+                        "preco": price,
+                        "preco_original": original_price,
+                        "desconto_percentual": discount,
+                        "url": url,
+                        "frete_gratis": free_shipping,
+                        "em_promocao": is_promotion
                     })
                 
                 # Salvar arquivo
@@ -1007,7 +1087,7 @@ class MercadoLivreScraper:
             
             # Executar processamento em thread
             thread = threading.Thread(
-                target=self._run_affiliate_generation,
+                target=self._profiled(self._run_affiliate_generation, "afiliados"),
                 args=(selected_file, affiliate_window, process_btn, close_btn, login_only_mode)
             )
             thread.daemon = True
@@ -1034,6 +1114,8 @@ class MercadoLivreScraper:
     def _run_affiliate_generation(self, file_path, window, process_btn, close_btn, login_only_mode=False):
         """Executar geração de links em thread separada"""
         try:
+            from scrapers.affiliate_manager import AffiliateManager
+            
             self.affiliate_processing = True
             
             # Callback para atualizar progresso
@@ -1106,6 +1188,7 @@ class MercadoLivreScraper:
             window.after(0, self.affiliate_progress_var.set, f"Erro: {str(e)}")
         
         finally:
+            get_tracer().flush()
             self.affiliate_processing = False
             # Reabilitar botões
             window.after(0, lambda: process_btn.configure(state="normal"))
@@ -1166,6 +1249,8 @@ class MercadoLivreScraper:
     def _run_immediate_login(self, window, progress_bar):
         """Executar login imediato em thread separada"""
         try:
+            from scrapers.affiliate_manager import AffiliateManager
+            
             # Executar processamento assíncrono
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
@@ -1256,12 +1341,144 @@ class MercadoLivreScraper:
     
     def run(self):
         """Executar aplicação"""
-        self.root.mainloop()
+        self.cache_metrics_logger.start()
+        try:
+            self.root.mainloop()
+        finally:
+            self.cache_metrics_logger.stop()
+
+def profile_startup():
+    """Medir tempo até a janela aparecer e custo dos imports sob demanda"""
+    timings = [("imports do main.py", _IMPORTS_DONE - _STARTUP_T0)]
+    
+    t0 = time.perf_counter()
+    app = MercadoLivreScraper()
+    app.root.update()
+    timings.append(("criação da janela", time.perf_counter() - t0))
+    window_ready = time.perf_counter() - _STARTUP_T0
+    
+    # Módulos pesados carregados antes da janela indicam regressão
+    preloaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    app.root.destroy()
+    
+    print("⏱️  Inicialização do Mercado Livre Scraper")
+    for label, seconds in timings:
+        print(f"   {label:<40} {seconds * 1000:8.1f} ms")
+    print(f"   {'janela pronta (total)':<40} {window_ready * 1000:8.1f} ms")
+    
+    if preloaded:
+        print(f"⚠️  Módulos pesados carregados antes da janela: {', '.join(preloaded)}")
+    
+    # Custo incremental de cada import sob demanda (na ordem abaixo)
+    print("\n📦 Imports sob demanda (custo incremental)")
+    for name in HEAVY_MODULES:
+        t = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            status = f"{(time.perf_counter() - t) * 1000:8.1f} ms"
+        except ImportError as e:
+            status = f"indisponível ({e})"
+        print(f"   {name:<40} {status}")
+    
+    # Construir UserAgent() pode ler ou baixar dados
+    t = time.perf_counter()
+    try:
+        from fake_useragent import UserAgent
+        UserAgent()
+        status = f"{(time.perf_counter() - t) * 1000:8.1f} ms"
+    except Exception as e:
+        status = f"falhou ({e})"
+    print(f"   {'fake_useragent.UserAgent()':<40} {status}")
+    
+    print("\n💡 Para detalhes por módulo: python -X importtime main.py --profile-startup")
 
 def main():
     """Função principal"""
-    app = MercadoLivreScraper()
+    parser = argparse.ArgumentParser(description="Mercado Livre Scraper")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Mostrar o tempo de inicialização por etapa e sair"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="ARQUIVO",
+        help="Gravar spans das buscas/afiliados em JSON (Chrome Trace, abre no Perfetto)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Perfilar cada busca/geração de links e salvar flame graph em data/profiles/"
+    )
+    parser.add_argument(
+        "--export-parquet",
+        metavar="PASTA",
+        nargs="?",
+        const=ScraperConfig.PARQUET_EXPORT_DIR,
+        help="Exportar histórico de preços e catálogo do cache para Parquet (particionado por data) e sair"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="AAAA-MM-DD",
+        help="Com --export-parquet: exportar só o histórico a partir desta data"
+    )
+    parser.add_argument(
+        "--analytics",
+        metavar="PASTA_PARQUET",
+        nargs="?",
+        const="",
+        help="Rodar os relatórios de preços no DuckDB (sobre o cache SQLite ou uma exportação Parquet) e sair"
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Compactar o cache SQLite (VACUUM completo, converte bancos antigos para auto_vacuum incremental) e sair"
+    )
+    args = parser.parse_args()
+    
+    if args.trace:
+        enable_tracing(args.trace)
+    
+    if args.profile_startup:
+        profile_startup()
+        return
+    
+    if args.export_parquet:
+        from scrapers.utils.parquet_export import export_parquet
+        try:
+            export_parquet(output_dir=args.export_parquet, since=args.since)
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+    
+    if args.analytics is not None:
+        from scrapers.utils.analytics import PriceAnalytics, print_reports
+        try:
+            with PriceAnalytics(parquet_dir=args.analytics or None) as analytics:
+                print_reports(analytics.run_all())
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+    
+    if args.vacuum:
+        from scrapers.utils.cache import ScraperCache
+        
+        async def vacuum():
+            async with ScraperCache() as cache:
+                await cache.vacuum()
+        
+        try:
+            asyncio.run(vacuum())
+        except Exception as e:
+            print(f"❌ Erro ao compactar o cache: {e}")
+            sys.exit(1)
+        return
+    
+    app = MercadoLivreScraper(profile_runs=args.profile)
     app.run()
+    get_tracer().flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
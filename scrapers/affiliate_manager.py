@@ -16,8 +16,10 @@ from rich.panel import Panel
 from rich import box
 
 from .engines.playwright_engine import PlaywrightEngine
+from .utils.cache import ScraperCache
 from .utils.validators import Product
 from .config import ScraperConfig
+from .utils.tracing import get_tracer
 
 console = Console()
 
@@ -26,6 +28,7 @@ class AffiliateManager:
     
     def __init__(self):
         self.engine: Optional[PlaywrightEngine] = None
+        self.cache: Optional[ScraperCache] = None
         self.config = ScraperConfig()
         self.affiliate_links: Dict[str, str] = {}
         
@@ -41,7 +44,10 @@ class AffiliateManager:
     async def start(self) -> None:
         """Inicializar engine em modo afiliado"""
         try:
-            self.engine = PlaywrightEngine(affiliate_mode=True)
+            # Cache compartilhado com as buscas: links já gerados são reaproveitados
+            self.cache = ScraperCache()
+            await self.cache.initialize()
+            self.engine = PlaywrightEngine(affiliate_mode=True, cache=self.cache)
             await self.engine.start()
             console.print("✅ AffiliateManager iniciado com sucesso")
         except Exception as e:
@@ -53,6 +59,9 @@ class AffiliateManager:
         if self.engine:
             await self.engine.close()
             console.print("🔧 AffiliateManager fechado")
+        if self.cache:
+            await self.cache.close()
+            self.cache = None
     
     async def login_and_setup(self, email: str = None, password: str = None) -> bool:
         """Login no Mercado Livre e configurar para geração de links"""
@@ -75,6 +84,13 @@ class AffiliateManager:
     
     def load_products_from_file(self, filepath: str) -> List[Product]:
         """Carregar produtos de arquivo JSON"""
+        with get_tracer().span('load_products', 'affiliate', file=filepath) as span:
+            products = self._load_products_from_file(filepath)
+            span.set(products=len(products))
+            return products
+    
+    def _load_products_from_file(self, filepath: str) -> List[Product]:
+        """Ler e validar os produtos do arquivo"""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -83,25 +99,50 @@ class AffiliateManager:
             
             # Detectar formato do arquivo
             if 'produtos' in data and isinstance(data['produtos'], list):
-                # Formato do sistema atual
+                # Formato do sistema atual; só arquivos do próprio auto-salvamento
+                # dispensam a validação (editados à mão ou de terceiros passam por ela)
+                trusted = (isinstance(data.get('info'), dict)
+                           and data['info'].get('formato') == ScraperConfig.AUTO_SAVE_FORMAT)
+                pending, slots = [], []
                 for product_data in data['produtos']:
-                    try:
-                        product = Product(
-                            name=product_data.get('nome', ''),
-                            price=product_data.get('preco', 0),
-                            original_price=product_data.get('preco_original'),
-                            url=product_data.get('url_completa', ''),
-                            image_url=product_data.get('imagem_url'),
-                            is_promotion=product_data.get('em_promocao', False),
-                            free_shipping=product_data.get('frete_gratis', False),
-                            product_id=product_data.get('produto_id'),
-                            category=product_data.get('categoria'),
-                            category_confidence=product_data.get('categoria_confianca', 0.0)
-                        )
-                        products.append(product)
-                    except Exception as e:
-                        console.print(f"⚠️ Erro ao processar produto: {e}")
-                        continue
+                    values = {
+                        'name': product_data.get('nome', ''),
+                        'price': product_data.get('preco'),
+                        'original_price': product_data.get('preco_original'),
+                        'url': product_data.get('url_completa', ''),
+                        'image_url': product_data.get('imagem_url'),
+                        'is_promotion': product_data.get('em_promocao', False),
+                        'free_shipping': product_data.get('frete_gratis', False),
+                        'product_id': product_data.get('produto_id'),
+                        'category': product_data.get('categoria'),
+                        'category_confidence': product_data.get('categoria_confianca', 0.0)
+                    }
+
+                    # Registros do auto-salvamento já saíram validados: sem revalidar
+                    if trusted and 'desconto_percentual' in product_data and 'coletado_em' in product_data:
+                        try:
+                            values['discount_percentage'] = product_data['desconto_percentual']
+                            values['scraped_at'] = datetime.fromisoformat(product_data['coletado_em'])
+                            products.append(Product.from_trusted(values))
+                            continue
+                        except (TypeError, ValueError):
+                            values.pop('discount_percentage', None)
+                            values.pop('scraped_at', None)
+                    pending.append(values)
+                    slots.append(len(products))
+                    products.append(None)
+
+                # Demais registros validados em lote, mantendo a ordem do arquivo
+                validated, errors = Product.validate_many(pending)
+                failed = {index for index, _ in errors}
+                validated = iter(validated)
+                for index, slot in enumerate(slots):
+                    if index not in failed:
+                        products[slot] = next(validated)
+                products = [product for product in products if product is not None]
+
+                for index, error in errors:
+                    console.print(f"⚠️ Erro ao processar produto '{pending[index]['name']}': {error}")
             
             console.print(f"✅ Carregados {len(products)} produtos de {filepath}")
             return products
@@ -138,25 +179,29 @@ class AffiliateManager:
         
         console.print(f"🔗 Iniciando geração de {len(products)} links de afiliado em lote...")
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            
-            task = progress.add_task("Gerando links...", total=len(products))
+        with get_tracer().span('affiliate_run', 'affiliate', products=len(products)) as span:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=console
+            ) as progress:
+                
+                task = progress.add_task("Gerando links...", total=len(products))
+                
+                def progress_callback(current, total, description):
+                    progress.update(task, completed=current, description=description)
+                
+                # Gerar links em lote único
+                results = await self.engine.generate_affiliate_links_batch(
+                    products, 
+                    progress_callback
+                )
             
-            def progress_callback(current, total, description):
-                progress.update(task, completed=current, description=description)
+            # Salvar resultados
+            with get_tracer().span('affiliate_save', 'affiliate'):
+                await self.save_affiliate_results(results)
             
-            # Gerar links em lote único
-            results = await self.engine.generate_affiliate_links_batch(
-                products, 
-                progress_callback
-            )
-        
-        # Salvar resultados
-        await self.save_affiliate_results(results)
+            span.set(success=results.get('success_count', 0))
         
         return results
     
@@ -3,8 +3,10 @@ Configurações do Sistema de Web Scraping
 """
 
 import random
-from typing import List, Dict
-from fake_useragent import UserAgent
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .utils.fingerprints import FingerprintProfile
 
 class ScraperConfig:
     """Configurações centralizadas do scraper"""
@@ -44,6 +46,10 @@ class ScraperConfig:
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0"
     ]
     
+    # Pool de fingerprints (UA + Client Hints + plataforma + viewport)
+    FINGERPRINT_POOL_FILE = "cache/fingerprint_pool.json"
+    FINGERPRINT_POOL_SIZE = 24
+    
     # Configurações de timing
     MIN_DELAY = 1.0
     MAX_DELAY = 3.0
@@ -57,12 +63,38 @@ class ScraperConfig:
     
     # Configurações de cache
     CACHE_TTL = 3600  # 1 hora
-    MAX_CACHE_SIZE = 1000
+    CACHE_SOFT_TTL = 600  # Após 10 min o resultado é servido e atualizado em segundo plano
+    MAX_CACHE_SIZE = 1000  # Buscas mantidas em memória e no SQLite
+    MAX_CACHE_BYTES = 64 * 1024 * 1024  # Limite da camada em memória (blobs codificados)
+    CACHE_BUSY_TIMEOUT_MS = 5000  # Espera por locks do SQLite antes de falhar
+    CACHE_BUSY_RETRIES = 5  # Novas tentativas quando o busy_timeout esgota (vários processos)
+    CACHE_BUSY_BACKOFF = 0.05  # Espera inicial entre tentativas (dobra a cada uma, com jitter)
+    CACHE_BUSY_BACKOFF_MAX = 2.0
+    CACHE_STATEMENT_CACHE_SIZE = 256  # Statements preparados mantidos na conexão
+    CATEGORY_CACHE_TTL = 30 * 24 * 3600  # Categoria de um produto quase nunca muda
+    CATEGORY_NEGATIVE_TTL = 6 * 3600  # Páginas sem breadcrumb são tentadas de novo depois
+    CATEGORY_PRELOAD_LIMIT = 5000  # Categorias mais usadas carregadas ao iniciar a engine
+    AFFILIATE_CACHE_TTL = 30 * 24 * 3600  # Link de afiliado gerado para um produto não muda (0 = sempre gerar de novo)
+    CACHE_METRICS_LOG_INTERVAL = 300  # Intervalo da linha de log com hit ratio e latência dos caches
+    CACHE_WRITE_GROUP = 64  # Máximo de escritas enfileiradas agrupadas numa transação
+    CACHE_RETENTION_DAYS = 90  # Histórico mantido pela retenção automática
+    CACHE_RETENTION_INTERVAL = 6 * 3600  # Intervalo mínimo entre retenções automáticas
+    CACHE_CATALOG_RETENTION_DAYS = 365  # Produtos sem coleta há mais tempo saem do catálogo (0 = nunca)
+    CACHE_DELETE_BATCH = 5000  # Linhas por DELETE (cada lote segura o lock de escrita pouco tempo)
+    CACHE_VACUUM_PAGES = 1000  # Páginas devolvidas ao disco por passo do incremental_vacuum
+    HISTORY_MODE = 'changes'  # 'changes': só grava quando o preço muda | 'full': uma linha por coleta
+    HISTORY_BATCH_SIZE = 500  # Linhas por executemany ao gravar histórico
+    PARQUET_EXPORT_DIR = "data/parquet"  # Saída da exportação colunar (histórico e catálogo)
+    PARQUET_CHUNK_ROWS = 50000  # Linhas por RecordBatch (limita a memória da exportação)
+    PARQUET_COMPRESSION = 'zstd'
+    REAL_DISCOUNT_MIN_PCT = 5.0  # Preço abaixo da média do histórico para contar como desconto real
+    HISTORY_FLUSH_INTERVAL = 2.0  # Segundos máximos no buffer do histórico
     
     # Configurações específicas para afiliados
     AFFILIATE_CONTEXT_DIR = "affiliate_profile"  # Diretório para salvar contexto do browser
     AFFILIATE_BATCH_SIZE = 10  # Processar links em lotes
     AFFILIATE_DELAY_BETWEEN_LINKS = 2.0  # Delay entre processamento de links
+    AUTO_SAVE_FORMAT = 'ml-scraper-autosave/1'  # Marca em info.formato dos arquivos do auto-salvamento
     
     # Seletores CSS para automação do gerador de links
     AFFILIATE_SELECTORS = {
@@ -77,10 +109,10 @@ class ScraperConfig:
     
     @staticmethod
     def get_random_user_agent() -> str:
-        """Retorna um user agent aleatório"""
+        """Retorna um user agent aleatório do pool de fingerprints"""
         try:
-            ua = UserAgent()
-            return ua.random
+            from .utils.fingerprints import get_fingerprint_pool
+            return get_fingerprint_pool().random().user_agent
         except:
             return random.choice(ScraperConfig.USER_AGENTS)
     
@@ -90,25 +122,28 @@ class ScraperConfig:
         return random.uniform(ScraperConfig.MIN_DELAY, ScraperConfig.MAX_DELAY)
     
     @staticmethod
-    def get_stealth_headers() -> Dict[str, str]:
-        """Headers para evitar detecção"""
-        return {
+    def get_stealth_headers(profile: Optional["FingerprintProfile"] = None) -> Dict[str, str]:
+        """Headers para evitar detecção, coerentes com o perfil de fingerprint"""
+        if profile is None:
+            from .utils.fingerprints import get_fingerprint_pool
+            profile = get_fingerprint_pool().random()
+        
+        headers = {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
             'Accept-Encoding': 'gzip, deflate, br',
             'Cache-Control': 'max-age=0',
             'Connection': 'keep-alive',
             'DNT': '1',
-            'Sec-CH-UA': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            'Sec-CH-UA-Mobile': '?0',
-            'Sec-CH-UA-Platform': '"Linux"',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Site': 'none',
             'Sec-Fetch-User': '?1',
             'Upgrade-Insecure-Requests': '1',
-            'User-Agent': ScraperConfig.get_random_user_agent()
+            'User-Agent': profile.user_agent
         }
+        headers.update(profile.client_hint_headers())
+        return headers
     
     @staticmethod
     def get_playwright_args() -> List[str]:
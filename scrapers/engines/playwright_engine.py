@@ -3,31 +3,63 @@ Engine de Scraping com Playwright - Anti-detecção avançada
 """
 
 import asyncio
+import json
 import random
 import os
+import time
+from contextvars import ContextVar
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from bs4 import BeautifulSoup
 
 from ..config import ScraperConfig
+from ..utils.cache import ScraperCache
+from ..utils.cache_metrics import get_cache_metrics
+from ..utils.canonical import product_key, canonical_search_params
 from ..utils.stealth import StealthMode
+from ..utils.fingerprints import FingerprintProfile, get_fingerprint_pool
+from ..utils.timing import PhaseTimer
+from ..utils.tracing import get_tracer
 from ..utils.validators import Product, DataProcessor, ProductClassifier
 
+# Timer próprio da atualização em segundo plano que roda na tarefa atual
+# (engine, timer): as fases medidas nela não caem na busca em primeiro plano
+_background_timings: ContextVar[Optional[Tuple["PlaywrightEngine", PhaseTimer]]] = ContextVar(
+    'background_timings', default=None
+)
+
 class PlaywrightEngine:
     """Engine principal usando Playwright com recursos anti-detecção"""
     
-    def __init__(self, affiliate_mode: bool = False):
+    def __init__(self, affiliate_mode: bool = False, cache: Optional[ScraperCache] = None):
         self.playwright = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.config = ScraperConfig()
         self.affiliate_mode = affiliate_mode
+        self.fingerprint: Optional[FingerprintProfile] = None
+        
+        # Tempo por fase: da busca atual e acumulado da engine
+        self.session_timings = PhaseTimer()
+        self._search_timings = PhaseTimer(parent=self.session_timings)
+        self.last_timing_summary: Dict[str, Any] = {}
+        self._search_span = None
         
         # Cache de categorias para evitar requisições repetidas
+        # (pré-carregado e persistido no ScraperCache quando houver um)
         self.category_cache = {}
+        self._pending_categories = {}
+        self._category_hits = {}
+        
+        # Cache de buscas (opcional) e atualizações em segundo plano
+        self.cache = cache
+        self._start_lock = asyncio.Lock()
+        self._page_lock = asyncio.Lock()  # Uma navegação por vez em self.page
+        self._refresh_tasks = set()
+        self._refreshing = set()
         
         # Estado do sistema de afiliados
         self.affiliate_logged_in = False
@@ -55,15 +87,14 @@ class PlaywrightEngine:
                 self.affiliate_context_dir = Path(self.config.AFFILIATE_CONTEXT_DIR)
                 self.affiliate_context_dir.mkdir(exist_ok=True)
                 
+                # Fingerprint fixo: a sessão salva deve ver sempre o mesmo navegador
+                self.fingerprint = get_fingerprint_pool().stable()
+                
                 self.browser = await self.playwright.chromium.launch_persistent_context(
                     user_data_dir=str(self.affiliate_context_dir),
                     headless=False,  # Mostrar browser para login manual se necessário
                     args=browser_args,
-                    user_agent=self.config.get_random_user_agent(),
-                    viewport={'width': 1366, 'height': 768},
-                    locale='pt-BR',
-                    timezone_id='America/Sao_Paulo',
-                    extra_http_headers=self.config.get_stealth_headers()
+                    **StealthMode.context_options(self.fingerprint)
                 )
                 self.context = self.browser
                 
@@ -74,19 +105,21 @@ class PlaywrightEngine:
                     args=browser_args
                 )
                 
+                self.fingerprint = get_fingerprint_pool().random()
+                
                 self.context = await self.browser.new_context(
-                    user_agent=self.config.get_random_user_agent(),
-                    viewport={'width': random.randint(1200, 1920), 'height': random.randint(800, 1080)},
-                    locale='pt-BR',
-                    timezone_id='America/Sao_Paulo',
-                    extra_http_headers=self.config.get_stealth_headers()
+                    **StealthMode.context_options(self.fingerprint)
                 )
             
+            # Stealth instalado uma vez no contexto (vale para todas as abas)
+            await StealthMode.setup_context_stealth(self.context, self.fingerprint)
+            
             # Página principal
-            self.page = await self.context.new_page()
+            self.page = await self.new_page()
             
-            # Configurar modo stealth
-            await StealthMode.setup_stealth(self.page)
+            # Modo afiliado usa o cache só para links; categorias não são consultadas
+            if self.cache is not None and not self.affiliate_mode:
+                await self._preload_categories()
             
             print("✅ Engine Playwright iniciada com sucesso")
             
@@ -94,8 +127,21 @@ class PlaywrightEngine:
             print(f"❌ Erro ao inicializar Playwright: {e}")
             raise
     
+    async def ensure_started(self) -> None:
+        """Iniciar o browser só quando a busca realmente precisar dele"""
+        async with self._start_lock:
+            if self.context is None:
+                await self.start()
+    
+    async def new_page(self) -> Page:
+        """Abrir nova aba pronta para uso (stealth já instalado no contexto)"""
+        if not self.context:
+            raise RuntimeError("Engine não iniciada - chame start() antes de new_page()")
+        return await self.context.new_page()
+    
     async def close(self) -> None:
         """Fechar browser e recursos"""
+        await self.wait_for_refreshes()
         try:
             if self.context:
                 await self.context.close()
@@ -111,17 +157,20 @@ class PlaywrightEngine:
         """Navegar para uma página com tratamento de erros"""
         try:
             # Navegar diretamente sem logs verbosos
-            response = await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)
+            with self.timings.phase('goto'):
+                response = await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)
             
             if not response or response.status >= 400:
                 return False
                 
             # Aguardar JavaScript carregar (reduzido)
-            await asyncio.sleep(2)
+            await self.timings.sleep(2)
             
             # Contornar proteções silenciosamente
-            await StealthMode.bypass_cloudflare(self.page)
-            await StealthMode.wait_for_page_load(self.page)
+            with self.timings.phase('cloudflare'):
+                await StealthMode.bypass_cloudflare(self.page)
+            with self.timings.phase('load_state'):
+                await StealthMode.wait_for_page_load(self.page)
             
             # Aguardar seletor específico se fornecido
             if wait_for_selector:
@@ -138,16 +187,25 @@ class PlaywrightEngine:
     
     async def extract_products_from_page(self, url: str) -> List[Product]:
         """Extrair produtos de uma página"""
+        with get_tracer().span('page', 'page', url=url) as span:
+            products = await self._extract_products_from_page(url)
+            span.set(products=len(products))
+            return products
+    
+    async def _extract_products_from_page(self, url: str) -> List[Product]:
+        """Navegar e extrair os cards de produto de uma página"""
         if not await self.navigate_to_page(url):
             return []
         
         try:
             # Aguardar produtos carregarem (otimizado)
-            await asyncio.sleep(1)
+            await self.timings.sleep(1)
             
             # Obter HTML da página
-            content = await self.page.content()
-            soup = BeautifulSoup(content, 'html.parser')
+            with self.timings.phase('content'):
+                content = await self.page.content()
+            with self.timings.phase('parse'):
+                soup = BeautifulSoup(content, 'html.parser')
             
             # Diferentes seletores para produtos
             product_selectors = [
@@ -162,7 +220,8 @@ class PlaywrightEngine:
             products = []
             
             for selector in product_selectors:
-                elements = soup.select(selector)
+                with self.timings.phase('parse'):
+                    elements = soup.select(selector)
                 
                 if elements and len(elements) > 1:  # Só usar seletores com produtos válidos
                     for element in elements[:50]:  # Limitar para evitar sobrecarga
@@ -178,13 +237,33 @@ class PlaywrightEngine:
     
     async def extract_category_from_product_page(self, product_url: str) -> tuple[Optional[str], float]:
         """Extrair categoria real da página individual do produto via breadcrumb"""
+        with get_tracer().span('enrichment', 'enrichment', url=product_url) as span:
+            category, confidence = await self._extract_category_from_product_page(product_url)
+            span.set(category=category, confidence=confidence)
+            return category, confidence
+    
+    async def _extract_category_from_product_page(self, product_url: str) -> tuple[Optional[str], float]:
+        """Consultar cache ou visitar a página do produto para obter a categoria"""
         if not product_url:
             return None, 0.0
         
-        # Verificar cache primeiro
-        url_key = product_url.split('?')[0]  # Remover parâmetros da URL
-        if url_key in self.category_cache:
-            cached_result = self.category_cache[url_key]
+        # Verificar cache primeiro (memória, depois SQLite)
+        url_key = self._category_key(product_url)
+        metrics = get_cache_metrics('category')
+        with metrics.timed('get'):
+            cached_result = self.category_cache.get(url_key)
+            if cached_result is None and self.cache is not None:
+                stored = await self.cache.get_category(url_key)
+                if stored:
+                    cached_result = {'category': stored[0], 'confidence': stored[1]}
+                    self.category_cache[url_key] = cached_result
+        
+        if cached_result is None:
+            metrics.miss()
+        else:
+            metrics.hit()
+            if self.cache is not None:
+                self._category_hits[url_key] = self._category_hits.get(url_key, 0) + 1
             return cached_result['category'], cached_result['confidence']
         
         try:
@@ -215,10 +294,7 @@ class PlaywrightEngine:
                             # Pular termos muito genéricos
                             if category.lower() not in ['início', 'home', 'mercado livre', 'ml']:
                                 # Adicionar ao cache
-                                self.category_cache[url_key] = {
-                                    'category': category,
-                                    'confidence': 0.9
-                                }
+                                self._remember_category(url_key, category, 0.9)
                                 return category, 0.9  # Alta confiança para breadcrumb
             
             # Fallback: buscar na meta description ou title
@@ -230,29 +306,60 @@ class PlaywrightEngine:
                     potential_category = parts[-1].strip()
                     if potential_category != 'Mercado Livre':
                         # Adicionar ao cache
-                        self.category_cache[url_key] = {
-                            'category': potential_category,
-                            'confidence': 0.6
-                        }
+                        self._remember_category(url_key, potential_category, 0.6)
                         return potential_category, 0.6
             
-            # Cache resultado negativo para evitar tentar novamente
-            self.category_cache[url_key] = {
-                'category': None,
-                'confidence': 0.0
-            }
+            # Cache resultado negativo para evitar tentar novamente (TTL curto no disco)
+            self._remember_category(url_key, None, 0.0)
             return None, 0.0
             
         except Exception as e:
-            # Cache resultado negativo para evitar tentar novamente
-            self.category_cache[url_key] = {
-                'category': None,
-                'confidence': 0.0
-            }
+            # Erro de navegação é passageiro: negativo só nesta engine
+            self._remember_category(url_key, None, 0.0, persist=False)
             return None, 0.0
+    
+    @staticmethod
+    def _category_key(product_url: str) -> str:
+        """Chave do cache de categorias: ID canônico do produto (ou URL sem parâmetros)"""
+        return product_key(product_url)
+    
+    def _remember_category(self, url_key: str, category: Optional[str], confidence: float, persist: bool = True) -> None:
+        """Guardar categoria em memória e marcar para gravação no SQLite"""
+        self.category_cache[url_key] = {
+            'category': category,
+            'confidence': confidence
+        }
+        if persist and self.cache is not None:
+            self._pending_categories[url_key] = (category, confidence)
+    
+    async def _preload_categories(self) -> None:
+        """Carregar as categorias mais usadas do SQLite para a memória"""
+        hot = await self.cache.load_hot_categories()
+        for url_key, (category, confidence) in hot.items():
+            self.category_cache.setdefault(url_key, {'category': category, 'confidence': confidence})
+        if hot:
+            print(f"🏷️ {len(hot)} categorias pré-carregadas do cache")
+    
+    async def _flush_categories(self) -> None:
+        """Gravar categorias novas e contagem de reutilização"""
+        if self.cache is None or not (self._pending_categories or self._category_hits):
+            return
+        
+        pending, self._pending_categories = self._pending_categories, {}
+        hits, self._category_hits = self._category_hits, {}
+        await self.cache.save_categories(pending, hits)
 
     async def _extract_single_product(self, element) -> Optional[Product]:
         """Extrair dados de um único produto"""
+        with get_tracer().span('card', 'card') as span:
+            product = await self._extract_single_product_data(element)
+            span.set(extracted=product is not None)
+            return product
+    
+    async def _extract_single_product_data(self, element) -> Optional[Product]:
+        """Ler nome, preços, URL e categoria de um card"""
+        card_started = time.perf_counter()
+        enrichment_time = 0.0
         try:
             # Nome do produto - buscar especificamente títulos de produtos
             name = None
@@ -347,10 +454,13 @@ class PlaywrightEngine:
             # Primeiro: tentar extrair categoria real da página do produto
             real_category, real_confidence = None, 0.0
             if product_url and len(product_url) < 200:  # Evitar URLs muito longas
+                enrichment_started = time.perf_counter()
                 try:
                     real_category, real_confidence = await self.extract_category_from_product_page(product_url)
                 except:
                     pass
+                enrichment_time = time.perf_counter() - enrichment_started
+                self.timings.record('enrichment', enrichment_time)
             
             # Segundo: usar sistema de palavras-chave como fallback
             fallback_category, fallback_confidence = ProductClassifier.classify_product(
@@ -387,9 +497,13 @@ class PlaywrightEngine:
             
         except Exception as e:
             return None
+        
+        finally:
+            # Tempo do card sem a visita à página do produto
+            self.timings.record('card', time.perf_counter() - card_started - enrichment_time)
     
-    async def search_products(self, query: str, max_products: int = 50) -> List[Product]:
-        """Buscar produtos por termo"""
+    async def _fetch_products(self, query: str, max_products: int = 50) -> List[Product]:
+        """Buscar produtos por termo no site"""
         products = []
         page_num = 1
         
@@ -409,10 +523,32 @@ class PlaywrightEngine:
             page_num += 1
             
             # Delay mínimo entre páginas
-            await asyncio.sleep(1)
+            await self.timings.sleep(1)
         
         return products[:max_products]
     
+    @property
+    def timings(self) -> PhaseTimer:
+        """Timer da busca atual; dentro de uma atualização em segundo plano, o dela"""
+        background = _background_timings.get()
+        if background is not None and background[0] is self:
+            return background[1]
+        return self._search_timings
+    
+    def _begin_search(self, search_type: str, **params) -> None:
+        """Reiniciar a medição de tempo e abrir o span de uma nova busca"""
+        self._search_timings.reset()
+        self._search_span = get_tracer().start_span('search', 'search', search_type=search_type, **params)
+    
+    def _finish_search(self, products: List[Product]) -> Dict[str, Any]:
+        """Fechar a medição da busca e guardar o resumo por fase"""
+        self.last_timing_summary = self._search_timings.summary()
+        print(PhaseTimer.format_report(self.last_timing_summary))
+        if self._search_span:
+            self._search_span.end(products=len(products))
+            self._search_span = None
+        return self.last_timing_summary
+    
     def _filter_relevant_products(self, products: List[Product], search_term: str) -> List[Product]:
         """Filtrar produtos relevantes baseado no termo de busca"""
         if not search_term:
@@ -443,8 +579,8 @@ class PlaywrightEngine:
         
         return relevant_products
     
-    async def search_products_with_progress(self, query: str, max_products: int = 50, progress_callback=None) -> List[Product]:
-        """Buscar produtos por termo com callback de progresso"""
+    async def _fetch_products_with_progress(self, query: str, max_products: int = 50, progress_callback=None) -> List[Product]:
+        """Buscar produtos por termo no site com callback de progresso"""
         products = []
         page_num = 1
         
@@ -470,7 +606,7 @@ class PlaywrightEngine:
             page_num += 1
             
             # Delay mínimo entre páginas
-            await asyncio.sleep(1)
+            await self.timings.sleep(1)
         
         # Callback final
         if progress_callback:
@@ -520,8 +656,8 @@ class PlaywrightEngine:
         
         return None
 
-    async def search_category_with_progress(self, category: str, max_products: int = 50, progress_callback=None) -> List[Product]:
-        """Buscar produtos por categoria com callback de progresso"""
+    async def _fetch_category_with_progress(self, category: str, max_products: int = 50, progress_callback=None) -> List[Product]:
+        """Buscar produtos por categoria no site com callback de progresso"""
         category_id = self._find_category_id(category)
         
         if not category_id:
@@ -552,7 +688,7 @@ class PlaywrightEngine:
             page_num += 1
             
             # Delay mínimo entre páginas
-            await asyncio.sleep(1)
+            await self.timings.sleep(1)
         
         # Callback final
         if progress_callback:
@@ -560,8 +696,8 @@ class PlaywrightEngine:
         
         return products[:max_products]
     
-    async def search_offers_with_progress(self, max_products: int = 50, progress_callback=None) -> List[Product]:
-        """Buscar produtos em oferta com callback de progresso"""
+    async def _fetch_offers_with_progress(self, max_products: int = 50, progress_callback=None) -> List[Product]:
+        """Buscar produtos em oferta no site com callback de progresso"""
         products = []
         page_num = 1
         
@@ -590,7 +726,7 @@ class PlaywrightEngine:
             
             # Delay mínimo entre páginas
             if page_num <= 5:  # Só delay se vai continuar
-                await asyncio.sleep(1)
+                await self.timings.sleep(1)
         
         # Callback final
         if progress_callback:
@@ -598,8 +734,8 @@ class PlaywrightEngine:
         
         return products[:max_products]
     
-    async def search_category(self, category: str, max_products: int = 50) -> List[Product]:
-        """Buscar produtos por categoria"""
+    async def _fetch_category(self, category: str, max_products: int = 50) -> List[Product]:
+        """Buscar produtos por categoria no site"""
         category_id = self._find_category_id(category)
         
         if not category_id:
@@ -625,12 +761,12 @@ class PlaywrightEngine:
             page_num += 1
             
             # Delay mínimo entre páginas
-            await asyncio.sleep(1)
+            await self.timings.sleep(1)
         
         return products[:max_products]
     
-    async def search_offers(self, max_products: int = 50) -> List[Product]:
-        """Buscar produtos em oferta percorrendo múltiplas páginas"""
+    async def _fetch_offers(self, max_products: int = 50) -> List[Product]:
+        """Buscar produtos em oferta no site percorrendo múltiplas páginas"""
         products = []
         page_num = 1
         
@@ -655,10 +791,159 @@ class PlaywrightEngine:
             
             # Delay mínimo entre páginas
             if page_num <= 5:  # Só delay se vai continuar
-                await asyncio.sleep(1)
+                await self.timings.sleep(1)
         
         return products[:max_products]
     
+    # ===== BUSCAS COM CACHE (stale-while-revalidate) =====
+    
+    async def search_products(self, query: str, max_products: int = 50, max_age: Optional[float] = None) -> List[Product]:
+        """Buscar produtos por termo"""
+        return await self._cached_search(
+            'term', {'query': query, 'max_products': max_products},
+            lambda progress: self._fetch_products(query, max_products),
+            max_age=max_age
+        )
+    
+    async def search_products_with_progress(self, query: str, max_products: int = 50, progress_callback=None,
+                                            max_age: Optional[float] = None) -> List[Product]:
+        """Buscar produtos por termo com callback de progresso"""
+        # Esta variante filtra por relevância, então tem chave própria no cache
+        return await self._cached_search(
+            'term', {'query': query, 'max_products': max_products, 'relevance_filter': True},
+            lambda progress: self._fetch_products_with_progress(query, max_products, progress),
+            max_age=max_age, progress_callback=progress_callback
+        )
+    
+    async def search_category(self, category: str, max_products: int = 50, max_age: Optional[float] = None) -> List[Product]:
+        """Buscar produtos por categoria"""
+        return await self._cached_search(
+            'category', {'category': self._category_search_key(category), 'max_products': max_products},
+            lambda progress: self._fetch_category(category, max_products),
+            max_age=max_age
+        )
+    
+    async def search_category_with_progress(self, category: str, max_products: int = 50, progress_callback=None,
+                                            max_age: Optional[float] = None) -> List[Product]:
+        """Buscar produtos por categoria com callback de progresso"""
+        return await self._cached_search(
+            'category', {'category': self._category_search_key(category), 'max_products': max_products},
+            lambda progress: self._fetch_category_with_progress(category, max_products, progress),
+            max_age=max_age, progress_callback=progress_callback
+        )
+    
+    async def search_offers(self, max_products: int = 50, max_age: Optional[float] = None) -> List[Product]:
+        """Buscar produtos em oferta"""
+        return await self._cached_search(
+            'offers', {'max_products': max_products},
+            lambda progress: self._fetch_offers(max_products),
+            max_age=max_age
+        )
+    
+    async def search_offers_with_progress(self, max_products: int = 50, progress_callback=None,
+                                          max_age: Optional[float] = None) -> List[Product]:
+        """Buscar produtos em oferta com callback de progresso"""
+        return await self._cached_search(
+            'offers', {'max_products': max_products},
+            lambda progress: self._fetch_offers_with_progress(max_products, progress),
+            max_age=max_age, progress_callback=progress_callback
+        )
+    
+    def _category_search_key(self, category: str) -> str:
+        """Nomes diferentes da mesma categoria ('casa', 'Casa, Móveis e Decoração')
+        levam ao mesmo ID e compartilham a entrada do cache"""
+        return self._find_category_id(category) or category
+    
+    async def _cached_search(self, search_type: str, params: Dict[str, Any], fetch,
+                             max_age: Optional[float] = None, progress_callback=None) -> List[Product]:
+        """Ler a busca pelo cache e ir ao site só se preciso.
+        
+        max_age: idade máxima aceita em segundos (None = qualquer entrada válida,
+        0 = sempre buscar no site). Entradas mais velhas que CACHE_SOFT_TTL são
+        servidas na hora e atualizadas em segundo plano.
+        """
+        self._begin_search(search_type, **params)
+        products = []
+        try:
+            if self.cache is not None and max_age != 0:
+                with self.timings.phase('cache'):
+                    entry = await self.cache.get_cached_entry(search_type, params)
+                
+                if entry:
+                    cached_products, age = entry
+                    if max_age is None or age <= max_age:
+                        stale = age > self.config.CACHE_SOFT_TTL
+                        if stale:
+                            get_cache_metrics('search').stale()
+                            self._schedule_refresh(search_type, params, fetch)
+                        if self._search_span:
+                            self._search_span.set(cache='stale' if stale else 'hit', cache_age=round(age, 1))
+                        if progress_callback:
+                            progress_callback(len(cached_products), params.get('max_products', len(cached_products)),
+                                              f"⚡ Resultado do cache ({int(age // 60)} min)")
+                        products = cached_products
+                        return products
+            
+            if self._search_span:
+                self._search_span.set(cache='miss')
+            products = await self._fetch_and_cache(search_type, params, fetch, progress_callback)
+            return products
+        finally:
+            self._finish_search(products)
+    
+    async def _fetch_and_cache(self, search_type: str, params: Dict[str, Any], fetch, progress_callback=None) -> List[Product]:
+        """Buscar no site (uma navegação por vez) e gravar o resultado no cache"""
+        await self.ensure_started()
+        async with self._page_lock:
+            try:
+                products = await fetch(progress_callback)
+            finally:
+                await self._flush_categories()
+        
+        # Resultado vazio costuma ser bloqueio/erro de página: não guardar
+        if products and self.cache is not None:
+            await self.cache.cache_search_results(search_type, params, products)
+            # Cada coleta alimenta o histórico de preços e o catálogo (gravação em lote)
+            await self.cache.history_writer().add(products)
+        return products
+    
+    def _schedule_refresh(self, search_type: str, params: Dict[str, Any], fetch) -> None:
+        """Disparar atualização em segundo plano (uma por chave)"""
+        key = (search_type, json.dumps(canonical_search_params(params), sort_keys=True))
+        if key in self._refreshing:
+            return
+        
+        self._refreshing.add(key)
+        task = asyncio.create_task(self._refresh(key, search_type, params, fetch))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _refresh(self, key, search_type: str, params: Dict[str, Any], fetch) -> None:
+        """Atualizar uma entrada vencida do cache.
+        
+        Roda na própria tarefa com timer e span próprios: uma busca iniciada
+        no meio da atualização não reinicia nem recebe as fases dela.
+        """
+        timer = PhaseTimer(parent=self.session_timings)
+        _background_timings.set((self, timer))  # Vale só para o contexto desta tarefa
+        try:
+            with get_tracer().span('cache_refresh', 'cache', search_type=search_type, **params) as span:
+                products = await self._fetch_and_cache(search_type, params, fetch)
+                summary = timer.summary()
+                span.set(products=len(products), wall_time=summary['wall_time'])
+            print(f"🔄 Cache atualizado em segundo plano: {search_type} ({len(products)} produtos, "
+                  f"{summary['wall_time']:.1f}s)")
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar cache em segundo plano: {e}")
+        finally:
+            self._refreshing.discard(key)
+    
+    async def wait_for_refreshes(self) -> None:
+        """Aguardar atualizações em segundo plano pendentes"""
+        if self._refresh_tasks:
+            print(f"🔄 Aguardando {len(self._refresh_tasks)} atualização(ões) do cache...")
+            await asyncio.gather(*list(self._refresh_tasks), return_exceptions=True)
+    
     # ===== MÉTODOS PARA SISTEMA DE AFILIADOS =====
     
     async def open_for_manual_login(self) -> bool:
@@ -1010,9 +1295,14 @@ class PlaywrightEngine:
         
         total_products = len(products)
         
-        if not await self.navigate_to_affiliate_generator():
-            print("❌ Não foi possível acessar o gerador de links")
+        with get_tracer().span('affiliate_batch', 'affiliate', products=total_products) as span:
+            results = await self._generate_affiliate_links_batch(products, results, progress_callback)
+            span.set(success=results['success_count'], errors=results['error_count'])
             return results
+    
+    async def _generate_affiliate_links_batch(self, products: List[Product], results: Dict[str, Any], progress_callback=None) -> Dict[str, Any]:
+        """Navegar até o linkbuilder, enviar as URLs e mapear os links gerados"""
+        total_products = len(products)
         
         # Filtrar produtos com URLs válidas
         valid_products = [p for p in products if p.url and p.url.strip()]
@@ -1025,24 +1315,49 @@ class PlaywrightEngine:
         if progress_callback:
             progress_callback(0, total_products, "Preparando URLs para processamento...")
         
-        # Extrair todas as URLs
-        product_urls = [product.url for product in valid_products]
+        # Mesmo produto com URLs diferentes (tracking, #polycard...) usa uma chave só
+        keys = [product_key(product.url) for product in valid_products]
         
-        if progress_callback:
-            progress_callback(25, total_products, "Enviando URLs para o gerador...")
+        # Links já gerados em execuções anteriores não voltam ao linkbuilder
+        links_by_key = {}
+        if self.cache is not None:
+            links_by_key = await self.cache.get_affiliate_links(keys)
+            if links_by_key:
+                print(f"⚡ {len(links_by_key)} links de afiliado reaproveitados do cache")
         
-        # Processar tudo em uma única requisição
-        affiliate_links = await self.generate_affiliate_links_batch_single_request(product_urls)
+        # Uma URL por produto ainda sem link
+        pending = {}
+        for key, product in zip(keys, valid_products):
+            if key not in links_by_key:
+                pending.setdefault(key, product.url)
+        
+        if pending:
+            if not await self.navigate_to_affiliate_generator():
+                print("❌ Não foi possível acessar o gerador de links")
+                if not links_by_key:
+                    return results
+            else:
+                if progress_callback:
+                    progress_callback(25, total_products, "Enviando URLs para o gerador...")
+                
+                # Processar tudo em uma única requisição (links voltam na ordem das URLs)
+                product_urls = list(pending.values())
+                affiliate_links = await self.generate_affiliate_links_batch_single_request(product_urls)
+                generated = dict(zip(pending, affiliate_links))
+                links_by_key.update(generated)
+                
+                # Com links faltando o alinhamento por posição é incerto: não persistir
+                if self.cache is not None and len(affiliate_links) == len(product_urls):
+                    await self.cache.save_affiliate_links(generated)
         
         if progress_callback:
             progress_callback(75, total_products, "Organizando resultados...")
         
         # Mapear produtos com links gerados
         success_count = 0
-        for i, product in enumerate(valid_products):
-            if i < len(affiliate_links):
-                # Link encontrado na mesma posição
-                affiliate_link = affiliate_links[i]
+        for i, (key, product) in enumerate(zip(keys, valid_products)):
+            affiliate_link = links_by_key.get(key)
+            if affiliate_link:
                 results['links'][product.url] = affiliate_link
                 
                 # Adicionar ao mapeamento estruturado
@@ -0,0 +1,255 @@
+"""
+Relatórios analíticos no DuckDB sobre os dados coletados: o cache SQLite
+(anexado em modo leitura) ou a exportação Parquet (parquet_export)
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import ScraperConfig
+
+try:
+    import duckdb
+except ImportError:  # duckdb é opcional; só os relatórios dependem dele
+    duckdb = None
+
+# Mesmas colunas da exportação Parquet, montadas a partir das tabelas do cache.
+# source: 'full' = uma linha por produto em cada coleta, 'changes' = só mudanças de preço
+SQLITE_VIEWS = {
+    'history': """
+        SELECT product_id, name, price, original_price, url, CAST(scraped_at AS TIMESTAMP) AS observed_at,
+               'full' AS source
+        FROM cache.product_history
+        WHERE product_id IS NOT NULL
+        UNION ALL
+        SELECT p.product_id, i.name, p.price, p.original_price, i.url, CAST(p.observed_at AS TIMESTAMP),
+               'changes'
+        FROM cache.price_points p LEFT JOIN cache.product_info i ON i.product_id = p.product_id
+    """,
+    'catalog': """
+        SELECT product_id, name, price, original_price, discount_percentage, category, image_url, url,
+               affiliate_url, CAST(first_seen AS TIMESTAMP) AS first_seen, CAST(last_seen AS TIMESTAMP) AS last_seen
+        FROM cache.products
+    """,
+}
+
+# Estatísticas por produto na janela, com as mesmas regras de
+# ScraperCache.get_price_stats: o preço vigente no início da janela conta desde
+# o corte, cada preço vale até o próximo ponto (o último, até a última coleta
+# do produto no catálogo) e média/desvio são ponderados por esse tempo.
+# points = períodos de preço (preço inicial + mudanças)
+WINDOW_STATS = """
+    window_points AS (
+        SELECT product_id, price, observed_at FROM history
+        WHERE observed_at > $cutoff AND price IS NOT NULL
+        UNION ALL
+        SELECT product_id, arg_max(price, observed_at), $cutoff FROM history
+        WHERE observed_at <= $cutoff AND price IS NOT NULL
+        GROUP BY product_id
+    ),
+    window_periods AS (
+        SELECT p.product_id, p.price, p.observed_at,
+               LAG(p.price) OVER by_time AS previous_price,
+               epoch(COALESCE(LEAD(p.observed_at) OVER by_time,
+                              GREATEST(p.observed_at, COALESCE(c.last_seen, p.observed_at))))
+               - epoch(p.observed_at) AS held
+        FROM window_points p LEFT JOIN catalog c USING (product_id)
+        WINDOW by_time AS (PARTITION BY p.product_id ORDER BY p.observed_at)
+    ),
+    window_totals AS (
+        SELECT product_id, MIN(price) AS min_price, MAX(price) AS max_price,
+               COUNT(*) FILTER (WHERE previous_price IS NULL OR price <> previous_price) AS points,
+               SUM(held) AS held, SUM(price * held) AS price_held, SUM(price * price * held) AS square_held,
+               arg_max(price, observed_at) AS last_price
+        FROM window_periods
+        GROUP BY product_id
+    ),
+    window_stats AS (
+        SELECT product_id, min_price, max_price, points,
+               -- Um único instante (sem duração) fica com o último preço, como no cache
+               CASE WHEN held > 0 THEN price_held / held ELSE last_price END AS avg_price,
+               CASE WHEN held > 0 AND price_held > 0
+                    THEN SQRT(GREATEST(square_held / held - POW(price_held / held, 2), 0)) / (price_held / held)
+                    ELSE 0 END AS cv
+        FROM window_totals
+    )
+"""
+
+class PriceAnalytics:
+    """Consultas prontas executadas como varreduras vetorizadas no DuckDB.
+
+    Médias e volatilidade são ponderadas pelo tempo em que cada preço valeu
+    (WINDOW_STATS), então os veredictos batem com ScraperCache.analyze_discounts.
+    O mix por coleta só usa linhas completas (source = 'full'): os pontos de
+    mudança não dizem quais produtos uma coleta viu.
+    """
+
+    def __init__(self, db_path: str = "cache/scraper_cache.db", parquet_dir: Optional[str] = None):
+        if duckdb is None:
+            raise RuntimeError("duckdb não instalado.\nInstale com: pip install duckdb")
+
+        self.conn = duckdb.connect()
+        if parquet_dir:
+            self._attach_parquet(Path(parquet_dir))
+        else:
+            self._attach_sqlite(Path(db_path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _attach_sqlite(self, db_path: Path) -> None:
+        """Anexar o cache (extensão sqlite do DuckDB, carregada sob demanda)"""
+        if not db_path.exists():
+            raise FileNotFoundError(f"Cache não encontrado: {db_path}")
+        try:
+            self.conn.execute(f"ATTACH {_sql_string(db_path)} AS cache (TYPE SQLITE, READ_ONLY)")
+        except duckdb.Error as e:
+            raise RuntimeError(
+                f"Não foi possível anexar o SQLite no DuckDB ({e}).\n"
+                f"A extensão sqlite do DuckDB é baixada na primeira vez (precisa de rede);\n"
+                f"sem ela, exporte com --export-parquet e use os relatórios sobre a pasta Parquet."
+            ) from e
+
+        for name, query in SQLITE_VIEWS.items():
+            self.conn.execute(f"CREATE VIEW {name} AS {query}")
+
+    def _attach_parquet(self, parquet_dir: Path) -> None:
+        """Views sobre history/date=*/ e sobre o snapshot mais recente do catálogo"""
+        history = parquet_dir / 'history'
+        snapshots = sorted((parquet_dir / 'catalog').glob('snapshot=*'))
+        if not history.exists() or not snapshots:
+            raise FileNotFoundError(f"Exportação Parquet incompleta em: {parquet_dir}")
+
+        # Cada partição tem part-full.parquet e/ou part-changes.parquet (origem dos dados)
+        self.conn.execute(f"""
+            CREATE VIEW history AS
+            SELECT product_id, name, price, original_price, url, observed_at,
+                   CASE WHEN filename LIKE '%part-full.parquet' THEN 'full' ELSE 'changes' END AS source
+            FROM read_parquet({_sql_string(history.as_posix() + '/*/*.parquet')},
+                              hive_partitioning = true, filename = true)
+        """)
+        self.conn.execute(f"""
+            CREATE VIEW catalog AS
+            SELECT * FROM read_parquet({_sql_string(snapshots[-1].as_posix() + '/*.parquet')})
+        """)
+
+    def _fetch(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        cursor = self.conn.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _cutoff(days: int) -> datetime:
+        """Início da janela em UTC (mesmo relógio das datas gravadas no cache)"""
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+    def biggest_real_discounts(self, days: int = 30, min_pct: Optional[float] = None,
+                               limit: int = 50) -> List[Dict[str, Any]]:
+        """Produtos cujo preço atual está mais abaixo da média da janela (ponderada pelo tempo)"""
+        min_pct = ScraperConfig.REAL_DISCOUNT_MIN_PCT if min_pct is None else min_pct
+        return self._fetch(f"""
+            WITH {WINDOW_STATS}
+            SELECT c.product_id, c.name, c.category, c.price, c.original_price,
+                   c.discount_percentage AS advertised_pct,
+                   ROUND(w.avg_price, 2) AS avg_price, w.max_price, w.points,
+                   ROUND((w.avg_price - c.price) / w.avg_price * 100, 2) AS real_discount_pct,
+                   c.url, c.affiliate_url
+            FROM catalog c JOIN window_stats w USING (product_id)
+            WHERE c.price IS NOT NULL AND (w.avg_price - c.price) / w.avg_price * 100 >= $min_pct
+            ORDER BY real_discount_pct DESC
+            LIMIT $limit
+        """, {'cutoff': self._cutoff(days), 'min_pct': min_pct, 'limit': limit})
+
+    def price_volatility_by_category(self, days: int = 90, min_points: int = 2) -> List[Dict[str, Any]]:
+        """Coeficiente de variação do preço (ponderado pelo tempo) por produto,
+        agregado por categoria; min_points conta períodos de preço"""
+        return self._fetch(f"""
+            WITH {WINDOW_STATS}, per_product AS (
+                SELECT product_id, cv FROM window_stats
+                WHERE points >= $min_points
+            )
+            SELECT COALESCE(c.category, 'Indefinido') AS category,
+                   COUNT(*) AS products,
+                   ROUND(AVG(p.cv) * 100, 2) AS avg_volatility_pct,
+                   ROUND(MEDIAN(p.cv) * 100, 2) AS median_volatility_pct,
+                   ROUND(MAX(p.cv) * 100, 2) AS max_volatility_pct
+            FROM per_product p LEFT JOIN catalog c USING (product_id)
+            GROUP BY 1
+            ORDER BY avg_volatility_pct DESC
+        """, {'cutoff': self._cutoff(days), 'min_points': min_points})
+
+    def inflated_original_prices(self, days: int = 90, tolerance: float = 1.01,
+                                 limit: int = 100) -> List[Dict[str, Any]]:
+        """Preço "de" anunciado acima do maior preço já praticado na janela"""
+        return self._fetch(f"""
+            WITH {WINDOW_STATS}
+            SELECT c.product_id, c.name, c.category, c.price, c.original_price,
+                   w.max_price, w.points,
+                   ROUND((c.original_price / w.max_price - 1) * 100, 2) AS inflation_pct,
+                   c.url
+            FROM catalog c JOIN window_stats w USING (product_id)
+            WHERE c.original_price > w.max_price * $tolerance
+            ORDER BY inflation_pct DESC
+            LIMIT $limit
+        """, {'cutoff': self._cutoff(days), 'tolerance': tolerance, 'limit': limit})
+
+    def category_mix_per_crawl(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Participação de cada categoria nos produtos observados em cada dia de coleta.
+
+        Só linhas completas contam como observação de uma coleta; com
+        HISTORY_MODE = 'changes' elas não são gravadas e o relatório fica
+        vazio (ou só com os dias coletados no modo 'full').
+        """
+        if ScraperConfig.HISTORY_MODE != 'full':
+            print("⚠️ Mix por coleta: só os dias gravados com HISTORY_MODE = 'full' entram "
+                  "(no modo 'changes' o histórico não registra quais produtos cada coleta viu)")
+        return self._fetch("""
+            WITH observed AS (
+                SELECT DISTINCT CAST(observed_at AS DATE) AS crawl_date, product_id
+                FROM history
+                WHERE observed_at >= $cutoff AND source = 'full'
+            )
+            SELECT o.crawl_date, COALESCE(c.category, 'Indefinido') AS category,
+                   COUNT(*) AS products,
+                   ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (PARTITION BY o.crawl_date), 2) AS share_pct
+            FROM observed o LEFT JOIN catalog c USING (product_id)
+            GROUP BY 1, 2
+            ORDER BY crawl_date DESC, products DESC
+        """, {'cutoff': self._cutoff(days)})
+
+    def run_all(self) -> Dict[str, Any]:
+        """Todos os relatórios com o tempo de cada um"""
+        reports = {}
+        for name in ('biggest_real_discounts', 'price_volatility_by_category',
+                     'inflated_original_prices', 'category_mix_per_crawl'):
+            started = time.perf_counter()
+            rows = getattr(self, name)()
+            reports[name] = {'rows': rows, 'seconds': round(time.perf_counter() - started, 3)}
+        return reports
+
+def _sql_string(value: Any) -> str:
+    """Literal de texto SQL (caminhos não podem ser parâmetros em ATTACH/read_parquet)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def print_reports(reports: Dict[str, Any], top: int = 10) -> None:
+    """Resumo dos relatórios no terminal"""
+    titles = {
+        'biggest_real_discounts': "💸 Maiores descontos reais (preço atual x média)",
+        'price_volatility_by_category': "📉 Volatilidade de preço por categoria",
+        'inflated_original_prices': "🎈 Preço original inflado em relação ao histórico",
+        'category_mix_per_crawl': "🗂️ Mix de categorias por dia de coleta",
+    }
+    for name, report in reports.items():
+        rows = report['rows']
+        print(f"\n{titles.get(name, name)} — {len(rows)} linhas em {report['seconds'] * 1000:.0f} ms")
+        for row in rows[:top]:
+            print("   " + " | ".join(f"{key}={value}" for key, value in row.items()
+                                     if key not in ('url', 'affiliate_url')))
@@ -5,303 +5,1584 @@ Sistema de cache com SQLite para otimizar performance
 import sqlite3
 import json
 import hashlib
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import asyncio
+import random
+import time
+from collections import deque
 import aiosqlite
 from pathlib import Path
 
+from ..config import ScraperConfig
 from .validators import Product
+from .tracing import get_tracer
+from .timing import percentile
+from .codec import encode_products, decode_products
+from .memory_cache import get_search_lru
+from .cache_metrics import get_cache_metrics, cache_metrics_snapshot
+from .canonical import canonical_search_params
+
+# Migrações do schema: (versão, statements). Nunca editar uma versão já publicada;
+# mudanças novas entram como uma versão nova no fim da lista.
+MIGRATIONS = [
+    (1, [
+        """
+        CREATE TABLE IF NOT EXISTS search_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cache_key TEXT UNIQUE,
+            query_type TEXT,
+            query_params TEXT,
+            products_json TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS product_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id TEXT,
+            name TEXT,
+            price REAL,
+            original_price REAL,
+            url TEXT,
+            scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS selector_performance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            selector TEXT,
+            selector_type TEXT,
+            success_count INTEGER DEFAULT 0,
+            total_attempts INTEGER DEFAULT 0,
+            last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (2, [
+        # Histórico por produto ordenado por data (get_price_history)
+        """
+        CREATE INDEX IF NOT EXISTS idx_product_history_product_scraped
+        ON product_history (product_id, scraped_at)
+        """,
+        # Limpeza por data sem varrer a tabela
+        """
+        CREATE INDEX IF NOT EXISTS idx_product_history_scraped
+        ON product_history (scraped_at)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_search_cache_expires
+        ON search_cache (expires_at)
+        """,
+        # Consolidar seletores duplicados antes de criar a chave única
+        """
+        UPDATE selector_performance SET
+            success_count = (SELECT SUM(s.success_count) FROM selector_performance s
+                             WHERE s.selector IS selector_performance.selector
+                             AND s.selector_type IS selector_performance.selector_type),
+            total_attempts = (SELECT SUM(s.total_attempts) FROM selector_performance s
+                              WHERE s.selector IS selector_performance.selector
+                              AND s.selector_type IS selector_performance.selector_type),
+            last_used = (SELECT MAX(s.last_used) FROM selector_performance s
+                         WHERE s.selector IS selector_performance.selector
+                         AND s.selector_type IS selector_performance.selector_type)
+        WHERE id IN (SELECT MIN(id) FROM selector_performance GROUP BY selector, selector_type)
+        """,
+        """
+        DELETE FROM selector_performance
+        WHERE id NOT IN (SELECT MIN(id) FROM selector_performance GROUP BY selector, selector_type)
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_selector_performance_key
+        ON selector_performance (selector, selector_type)
+        """,
+    ]),
+    (3, [
+        # Resultados codificados por codec.encode_products (products_json fica só para legado)
+        "ALTER TABLE search_cache ADD COLUMN products_blob BLOB",
+    ]),
+    (4, [
+        # Categoria real (breadcrumb) por produto; category NULL = resultado negativo
+        """
+        CREATE TABLE IF NOT EXISTS category_cache (
+            product_key TEXT PRIMARY KEY,
+            category TEXT,
+            confidence REAL DEFAULT 0,
+            hits INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_category_cache_hits
+        ON category_cache (hits DESC, updated_at DESC)
+        """,
+    ]),
+    (5, [
+        # Histórico só de mudanças (HISTORY_MODE = 'changes'): dados fixos por produto...
+        """
+        CREATE TABLE IF NOT EXISTS product_info (
+            product_id TEXT PRIMARY KEY,
+            name TEXT,
+            url TEXT,
+            last_price REAL,
+            last_original_price REAL,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        # ...e um ponto por mudança de preço, válido até o próximo ponto
+        """
+        CREATE TABLE IF NOT EXISTS price_points (
+            product_id TEXT,
+            observed_at TIMESTAMP,
+            price REAL,
+            original_price REAL,
+            PRIMARY KEY (product_id, observed_at)
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (6, [
+        # Resumo de preços por produto mantido a cada coleta (estatísticas de todo o período)
+        """
+        CREATE TABLE IF NOT EXISTS price_summary (
+            product_id TEXT PRIMARY KEY,
+            min_price REAL,
+            max_price REAL,
+            price_sum REAL,
+            price_count INTEGER,
+            last_price REAL,
+            last_original_price REAL,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        # Preencher com o histórico que já existe
+        """
+        INSERT OR REPLACE INTO price_summary
+        SELECT product_id, MIN(price), MAX(price), SUM(price), COUNT(price),
+               MAX(CASE WHEN rn = 1 THEN price END),
+               MAX(CASE WHEN rn = 1 THEN original_price END),
+               MIN(observed_at), MAX(observed_at)
+        FROM (
+            SELECT product_id, price, original_price, observed_at,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY observed_at DESC) AS rn
+            FROM (
+                SELECT product_id, price, original_price, scraped_at AS observed_at FROM product_history
+                WHERE product_id IS NOT NULL AND price IS NOT NULL
+                UNION ALL
+                SELECT product_id, price, original_price, observed_at FROM price_points
+                WHERE price IS NOT NULL
+            )
+        )
+        GROUP BY product_id
+        """,
+    ]),
+    (7, [
+        # Marcas de manutenção (ex.: última retenção) compartilhadas entre execuções
+        """
+        CREATE TABLE IF NOT EXISTS cache_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (8, [
+        # Links de afiliado já gerados, para não reenviar o mesmo produto ao linkbuilder
+        """
+        CREATE TABLE IF NOT EXISTS affiliate_links (
+            product_key TEXT PRIMARY KEY,
+            affiliate_url TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+    ]),
+    (9, [
+        # Catálogo: último estado conhecido de cada produto (upsert a cada coleta)
+        """
+        CREATE TABLE IF NOT EXISTS products (
+            product_id TEXT PRIMARY KEY,
+            name TEXT,
+            price REAL,
+            original_price REAL,
+            discount_percentage REAL DEFAULT 0,
+            category TEXT,
+            image_url TEXT,
+            url TEXT,
+            affiliate_url TEXT,
+            first_seen TIMESTAMP,
+            last_seen TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products (category, discount_percentage)",
+        "CREATE INDEX IF NOT EXISTS idx_products_last_seen ON products (last_seen)",
+        # Preencher com o que o histórico já conhece (dados de mudança primeiro)
+        """
+        INSERT OR IGNORE INTO products
+        (product_id, name, price, original_price, discount_percentage, url, first_seen, last_seen)
+        SELECT product_id, name, last_price, last_original_price,
+               CASE WHEN last_original_price > last_price
+                    THEN ROUND((last_original_price - last_price) / last_original_price * 100, 2)
+                    ELSE 0 END,
+               url, first_seen, last_seen
+        FROM product_info
+        """,
+        """
+        INSERT OR IGNORE INTO products
+        (product_id, name, price, original_price, discount_percentage, url, first_seen, last_seen)
+        SELECT product_id, name, price, original_price,
+               CASE WHEN original_price > price
+                    THEN ROUND((original_price - price) / original_price * 100, 2)
+                    ELSE 0 END,
+               url, first_seen, scraped_at
+        FROM (
+            SELECT product_id, name, price, original_price, url, scraped_at,
+                   MIN(scraped_at) OVER (PARTITION BY product_id) AS first_seen,
+                   ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY scraped_at DESC) AS rn
+            FROM product_history WHERE product_id IS NOT NULL
+        )
+        WHERE rn = 1
+        """,
+    ]),
+    (10, [
+        # Média do resumo ponderada pelo tempo em que cada preço valeu e contagem de
+        # períodos de preço, como nas estatísticas por janela (price_sum/price_count
+        # deixam de ser mantidos)
+        "ALTER TABLE price_summary ADD COLUMN weighted_sum REAL DEFAULT 0",
+        "ALTER TABLE price_summary ADD COLUMN weighted_days REAL DEFAULT 0",
+        "ALTER TABLE price_summary ADD COLUMN price_periods INTEGER DEFAULT 0",
+        # Preencher a partir do histórico: cada preço vale até o próximo ponto ou a última coleta
+        """
+        UPDATE price_summary
+        SET weighted_sum = totals.weighted_sum,
+            weighted_days = totals.weighted_days,
+            price_periods = totals.price_periods
+        FROM (
+            SELECT product_id, SUM(price * held_days) AS weighted_sum, SUM(held_days) AS weighted_days,
+                   SUM(previous_price IS NULL OR price <> previous_price) AS price_periods
+            FROM (
+                SELECT series.product_id, price,
+                       LAG(price) OVER by_time AS previous_price,
+                       julianday(COALESCE(LEAD(observed_at) OVER by_time,
+                                          MAX(observed_at, COALESCE(product_info.last_seen, observed_at))))
+                       - julianday(observed_at) AS held_days
+                FROM (
+                    SELECT product_id, price, scraped_at AS observed_at FROM product_history
+                    WHERE product_id IS NOT NULL AND price IS NOT NULL
+                    UNION ALL
+                    SELECT product_id, price, observed_at FROM price_points
+                    WHERE price IS NOT NULL
+                ) AS series
+                LEFT JOIN product_info ON product_info.product_id = series.product_id
+                WINDOW by_time AS (PARTITION BY series.product_id ORDER BY observed_at)
+            )
+            GROUP BY product_id
+        ) AS totals
+        WHERE price_summary.product_id = totals.product_id
+        """,
+    ]),
+]
+
+def is_busy_error(error: BaseException) -> bool:
+    """SQLITE_BUSY/SQLITE_LOCKED: outra conexão (ou processo) segura o lock"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+def _legacy_product(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro de products_json (product.dict() com default=str) -> valores do modelo"""
+    if isinstance(data.get('scraped_at'), str):
+        data['scraped_at'] = datetime.fromisoformat(data['scraped_at'])
+    return data
 
 class ScraperCache:
     """Cache inteligente para scraping com SQLite"""
-    
+
     def __init__(self, db_path: str = "cache/scraper_cache.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self.ttl_hours = 2  # Cache válido por 2 horas
-        
+        self.ttl_hours = ScraperConfig.CACHE_TTL / 3600
+        self.memory = get_search_lru()  # Camada em memória compartilhada pelo processo
+
+        # Conexão de leitura mantida durante toda a vida do cache; escritas vão
+        # para a tarefa do CacheWriter, que tem conexão própria
+        self._db: Optional[aiosqlite.Connection] = None
+        self._writer: Optional["CacheWriter"] = None
+        self._history_writer: Optional["HistoryWriter"] = None
+        self.busy_retries = 0
+
     async def __aenter__(self):
         """Context manager entry"""
         await self.initialize()
         return self
-        
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
-        pass
-    
+        await self.close()
+
+    async def _open_connection(self) -> aiosqlite.Connection:
+        """Abrir conexão configurada para WAL e com cache de statements"""
+        db = await aiosqlite.connect(
+            self.db_path,
+            cached_statements=ScraperConfig.CACHE_STATEMENT_CACHE_SIZE
+        )
+        try:
+            # busy_timeout primeiro: os PRAGMAs seguintes já esperam por outros processos
+            await db.execute(f"PRAGMA busy_timeout={int(ScraperConfig.CACHE_BUSY_TIMEOUT_MS)}")
+
+            async def configure():
+                # Só vale para banco novo; bancos antigos são convertidos com vacuum() (main.py --vacuum)
+                await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.execute("PRAGMA temp_store=MEMORY")
+
+            await self._retry_busy(configure, 'abrir conexão')
+        except BaseException:
+            # Sem fechar, a thread do aiosqlite impede o processo de terminar
+            await db.close()
+            raise
+        return db
+
+    async def _connection(self) -> aiosqlite.Connection:
+        """Conexão persistente (inicializa o cache no primeiro uso)"""
+        if self._db is None:
+            await self.initialize()
+        return self._db
+
+    async def close(self) -> None:
+        """Gravar histórico e escritas pendentes e fechar as conexões"""
+        if self._history_writer is not None:
+            await self._history_writer.close()
+            self._history_writer = None
+
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+        if self._db is not None:
+            try:
+                await self._db.close()
+            except Exception as e:
+                print(f"⚠️ Erro ao fechar cache: {e}")
+            self._db = None
+
     async def initialize(self) -> None:
-        """Inicializar tabelas do cache"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS search_cache (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cache_key TEXT UNIQUE,
-                    query_type TEXT,
-                    query_params TEXT,
-                    products_json TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP
-                )
-            """)
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS product_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id TEXT,
-                    name TEXT,
-                    price REAL,
-                    original_price REAL,
-                    url TEXT,
-                    scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS selector_performance (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    selector TEXT,
-                    selector_type TEXT,
-                    success_count INTEGER DEFAULT 0,
-                    total_attempts INTEGER DEFAULT 0,
-                    last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            await db.commit()
-            print("✅ Cache SQLite inicializado")
-    
+        """Abrir conexão e aplicar migrações pendentes do schema"""
+        try:
+            if self._db is None:
+                self._db = await self._open_connection()
+
+            await self._migrate(self._db)
+
+            if self._writer is None:
+                self._writer = CacheWriter(self)
+                await self._writer.start()
+        except BaseException:
+            # Falha ao abrir (ex.: banco travado por outro processo): não deixar conexões abertas
+            await self.close()
+            raise
+
+        print("✅ Cache SQLite inicializado")
+
+    async def _write(self, operation, label: str = 'write'):
+        """Enfileirar operação de escrita (async def op(db)) para o CacheWriter"""
+        if self._writer is None:
+            await self.initialize()
+        return await self._writer.submit(operation, label)
+
+    async def _retry_busy(self, operation, label: str = 'cache'):
+        """Executar operation() repetindo com backoff exponencial (com jitter)
+        quando o busy_timeout esgota sem conseguir o lock"""
+        retries = ScraperConfig.CACHE_BUSY_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                return await operation()
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == retries:
+                    raise
+                self.busy_retries += 1
+                delay = min(ScraperConfig.CACHE_BUSY_BACKOFF * 2 ** attempt, ScraperConfig.CACHE_BUSY_BACKOFF_MAX)
+                print(f"🔒 Cache ocupado ({label}), nova tentativa em {delay:.2f}s")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+    async def _migrate(self, db: aiosqlite.Connection) -> None:
+        """Aplicar migrações acima do PRAGMA user_version, cada uma numa transação"""
+        async with db.execute("PRAGMA user_version") as cursor:
+            row = await cursor.fetchone()
+        current = row[0] if row else 0
+
+        for version, statements in MIGRATIONS:
+            if version <= current:
+                continue
+
+            async def apply(version=version, statements=statements) -> bool:
+                await db.execute("BEGIN IMMEDIATE")
+                try:
+                    # Outro processo pode ter migrado enquanto esperávamos o lock
+                    async with db.execute("PRAGMA user_version") as cursor:
+                        if (await cursor.fetchone())[0] >= version:
+                            await db.rollback()
+                            return False
+                    for statement in statements:
+                        await db.execute(statement)
+                    await db.execute(f"PRAGMA user_version={version}")
+                    await db.commit()
+                    return True
+                except Exception:
+                    await db.rollback()
+                    raise
+
+            if await self._retry_busy(apply, 'migração'):
+                print(f"🗄️ Schema do cache migrado para versão {version}")
+
     def _generate_cache_key(self, query_type: str, params: Dict[str, Any]) -> str:
-        """Gerar chave única para cache"""
-        cache_data = f"{query_type}:{json.dumps(params, sort_keys=True)}"
+        """Gerar chave única para cache (termos normalizados: 'Céular  X' == 'celular x')"""
+        cache_data = f"{query_type}:{json.dumps(canonical_search_params(params), sort_keys=True)}"
         return hashlib.md5(cache_data.encode()).hexdigest()
-    
+
     async def get_cached_search(self, query_type: str, params: Dict[str, Any]) -> Optional[List[Product]]:
-        """Recuperar busca do cache"""
+        """Recuperar busca do cache (memória primeiro, depois SQLite)"""
+        entry = await self.get_cached_entry(query_type, params)
+        return entry[0] if entry else None
+
+    async def get_cached_entry(self, query_type: str, params: Dict[str, Any]) -> Optional[Tuple[List[Product], float]]:
+        """Recuperar busca do cache com a idade da entrada em segundos"""
+        metrics = get_cache_metrics('search')
+        with metrics.timed('get'):
+            entry = await self._read_cached_entry(query_type, params)
+        if entry:
+            metrics.hit()
+        else:
+            metrics.miss()
+        return entry
+
+    async def _read_cached_entry(self, query_type: str, params: Dict[str, Any]) -> Optional[Tuple[List[Product], float]]:
+        """Ler a entrada na memória e, se preciso, no SQLite"""
         cache_key = self._generate_cache_key(query_type, params)
-        
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
+        memory_key = (str(self.db_path), cache_key)
+
+        with get_tracer().span('cache_read', 'cache', query_type=query_type) as span:
+            memory_entry = self.memory.get_with_age(memory_key)
+            if memory_entry is not None:
+                products_blob, age = memory_entry
+                span.set(tier='memory')
+                products = decode_products(products_blob)
+                print(f"⚡ Cache em memória: {len(products)} produtos recuperados")
+                return products, age
+
+            try:
+                db = await self._connection()
                 async with db.execute("""
-                    SELECT products_json, expires_at FROM search_cache 
+                    SELECT products_blob, products_json,
+                           (julianday(expires_at) - julianday('now')) * 86400,
+                           (julianday('now') - julianday(created_at)) * 86400
+                    FROM search_cache
                     WHERE cache_key = ? AND expires_at > datetime('now')
                 """, (cache_key,)) as cursor:
-                    
                     row = await cursor.fetchone()
-                    if row:
-                        products_json, expires_at = row
-                        products_data = json.loads(products_json)
-                        
-                        # Converter de volta para objetos Product
-                        products = [Product(**data) for data in products_data]
-                        
-                        print(f"💾 Cache hit: {len(products)} produtos recuperados")
-                        return products
-            
-        except Exception as e:
-            print(f"⚠️ Erro ao ler cache: {e}")
-        
+
+                if row:
+                    span.set(tier='sqlite')
+                    products_blob, products_json, remaining, age = row
+                    if products_blob is not None:
+                        products = decode_products(products_blob)
+                    else:
+                        # Entradas gravadas antes do codec binário (já validadas ao gravar)
+                        products = [Product.from_trusted(_legacy_product(data)) for data in json.loads(products_json)]
+                        products_blob = encode_products(products)
+
+                    # Promover para a memória até o fim da validade no disco
+                    self.memory.put(memory_key, products_blob, ttl=remaining, age=age)
+
+                    print(f"💾 Cache hit: {len(products)} produtos recuperados")
+                    return products, age
+
+            except Exception as e:
+                get_cache_metrics('search').error()
+                print(f"⚠️ Erro ao ler cache: {e}")
+
         return None
-    
+
     async def cache_search_results(self, query_type: str, params: Dict[str, Any], products: List[Product]) -> None:
-        """Salvar resultados no cache"""
+        """Salvar resultados no cache (memória e SQLite)"""
         cache_key = self._generate_cache_key(query_type, params)
-        expires_at = datetime.now() + timedelta(hours=self.ttl_hours)
-        
-        try:
-            # Converter produtos para JSON
-            products_data = [product.dict() for product in products]
-            products_json = json.dumps(products_data, default=str)
-            
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO search_cache 
-                    (cache_key, query_type, query_params, products_json, expires_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    cache_key, 
-                    query_type, 
-                    json.dumps(params), 
-                    products_json, 
-                    expires_at
-                ))
-                
-                await db.commit()
-                print(f"💾 Cache salvo: {len(products)} produtos")
-                
-        except Exception as e:
-            print(f"⚠️ Erro ao salvar cache: {e}")
-    
-    async def save_product_history(self, products: List[Product]) -> None:
-        """Salvar histórico de produtos para análise de preços"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                for product in products:
+        ttl_seconds = int(self.ttl_hours * 3600)
+
+        metrics = get_cache_metrics('search')
+        with get_tracer().span('cache_write', 'cache', table='search_cache', products=len(products)), metrics.timed('put'):
+            try:
+                products_blob = encode_products(products)
+                self.memory.put((str(self.db_path), cache_key), products_blob, ttl=ttl_seconds)
+
+                async def write(db):
+                    # expires_at em UTC, mesmo relógio de datetime('now') usado nas consultas
                     await db.execute("""
-                        INSERT INTO product_history 
-                        (product_id, name, price, original_price, url)
-                        VALUES (?, ?, ?, ?, ?)
+                        INSERT OR REPLACE INTO search_cache
+                        (cache_key, query_type, query_params, products_blob, expires_at)
+                        VALUES (?, ?, ?, ?, datetime('now', ?))
                     """, (
-                        product.product_id,
-                        product.name,
-                        product.price,
-                        product.original_price,
-                        product.url
+                        cache_key,
+                        query_type,
+                        json.dumps(params),
+                        products_blob,
+                        f"+{ttl_seconds} seconds"
                     ))
-                
-                await db.commit()
+
+                    # Manter no disco só as MAX_CACHE_SIZE buscas mais recentes
+                    await db.execute("""
+                        DELETE FROM search_cache WHERE id IN (
+                            SELECT id FROM search_cache ORDER BY id DESC LIMIT -1 OFFSET ?
+                        )
+                    """, (ScraperConfig.MAX_CACHE_SIZE,))
+
+                await self._write(write, 'search_cache')
+                metrics.stored(len(products_blob))
+                print(f"💾 Cache salvo: {len(products)} produtos")
+
+            except Exception as e:
+                metrics.error()
+                print(f"⚠️ Erro ao salvar cache: {e}")
+
+    async def save_product_history(self, products: List[Product], batch_size: Optional[int] = None,
+                                   observed_at: Optional[str] = None) -> None:
+        """Salvar histórico de produtos para análise de preços (em lotes, numa transação).
+
+        observed_at: momento da coleta em UTC ('AAAA-MM-DD HH:MM:SS'); padrão é agora.
+        """
+        batch_size = batch_size or ScraperConfig.HISTORY_BATCH_SIZE
+        changes_mode = ScraperConfig.HISTORY_MODE == 'changes'
+
+        # Sem product_id não há como comparar com a coleta anterior: linha completa
+        keyed = [product for product in products if changes_mode and product.product_id]
+        full = [product for product in products if not (changes_mode and product.product_id)]
+
+        with get_tracer().span('cache_write', 'cache', table='product_history', products=len(products)):
+            try:
+                async def write(db):
+                    async with db.execute("SELECT COALESCE(?, datetime('now'))", (observed_at,)) as cursor:
+                        moment = (await cursor.fetchone())[0]
+
+                    for start in range(0, len(keyed), batch_size):
+                        await self._save_price_changes(db, keyed[start:start + batch_size], moment)
+
+                    summary_rows = [
+                        (product.product_id, product.price, product.original_price, moment)
+                        for product in products if product.product_id and product.price is not None
+                    ]
+                    for start in range(0, len(summary_rows), batch_size):
+                        await self._update_price_summary(db, summary_rows[start:start + batch_size])
+
+                    cataloged = [product for product in products if product.product_id]
+                    for start in range(0, len(cataloged), batch_size):
+                        await self._upsert_products(db, cataloged[start:start + batch_size], moment)
+
+                    rows = [
+                        (product.product_id, product.name, product.price, product.original_price, product.url, moment)
+                        for product in full
+                    ]
+                    for start in range(0, len(rows), batch_size):
+                        await db.executemany("""
+                            INSERT INTO product_history
+                            (product_id, name, price, original_price, url, scraped_at)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        """, rows[start:start + batch_size])
+
+                await self._write(write, 'product_history')
                 print(f"📊 Histórico salvo: {len(products)} produtos")
-                
+
+            except Exception as e:
+                print(f"⚠️ Erro ao salvar histórico: {e}")
+
+    async def _upsert_products(self, db: aiosqlite.Connection, products: List[Product], observed_at: str) -> None:
+        """Atualizar o catálogo com o estado desta coleta (coletas mais antigas não sobrescrevem)"""
+        await db.executemany("""
+            INSERT INTO products
+            (product_id, name, price, original_price, discount_percentage, category, image_url, url,
+             first_seen, last_seen)
+            VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?9)
+            ON CONFLICT (product_id) DO UPDATE SET
+                name = excluded.name,
+                price = excluded.price,
+                original_price = excluded.original_price,
+                discount_percentage = excluded.discount_percentage,
+                category = COALESCE(excluded.category, products.category),
+                image_url = COALESCE(excluded.image_url, products.image_url),
+                url = excluded.url,
+                last_seen = excluded.last_seen
+            WHERE excluded.last_seen >= products.last_seen
+        """, [
+            (product.product_id, product.name, product.price, product.original_price,
+             product.discount_percentage, product.category, product.image_url, product.url, observed_at)
+            for product in products
+        ])
+
+    async def get_catalog(self, category: Optional[str] = None, search: Optional[str] = None,
+                          min_discount: Optional[float] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Produtos do catálogo (último estado conhecido), mais recentes primeiro"""
+        conditions, params = [], []
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        if search:
+            conditions.append("name LIKE ?")
+            params.append(f"%{search}%")
+        if min_discount is not None:
+            conditions.append("discount_percentage >= ?")
+            params.append(min_discount)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            db = await self._connection()
+            async with db.execute(f"""
+                SELECT product_id, name, price, original_price, discount_percentage, category,
+                       image_url, url, affiliate_url, first_seen, last_seen
+                FROM products {where}
+                ORDER BY last_seen DESC
+                LIMIT ?
+            """, (*params, limit if limit is not None else -1)) as cursor:
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
         except Exception as e:
-            print(f"⚠️ Erro ao salvar histórico: {e}")
-    
+            print(f"⚠️ Erro ao consultar catálogo: {e}")
+            return []
+
+    async def _update_price_summary(self, db: aiosqlite.Connection, rows: List[Tuple]) -> None:
+        """Atualizar min/max/média ponderada/última observação de cada produto.
+
+        O preço anterior vale de last_seen até esta coleta e entra na média com
+        esse peso; price_periods só conta quando o preço muda. Coletas mais
+        antigas que last_seen só afetam mínimo e máximo.
+        """
+        await db.executemany("""
+            INSERT INTO price_summary
+            (product_id, min_price, max_price, weighted_sum, weighted_days, price_periods,
+             last_price, last_original_price, first_seen, last_seen)
+            VALUES (?1, ?2, ?2, 0, 0, 1, ?2, ?3, ?4, ?4)
+            ON CONFLICT (product_id) DO UPDATE SET
+                min_price = MIN(min_price, excluded.min_price),
+                max_price = MAX(max_price, excluded.max_price),
+                weighted_sum = weighted_sum + CASE WHEN excluded.last_seen > last_seen
+                    THEN last_price * (julianday(excluded.last_seen) - julianday(last_seen)) ELSE 0 END,
+                weighted_days = weighted_days + CASE WHEN excluded.last_seen > last_seen
+                    THEN julianday(excluded.last_seen) - julianday(last_seen) ELSE 0 END,
+                price_periods = price_periods + CASE WHEN excluded.last_seen >= last_seen
+                    AND excluded.last_price IS NOT last_price THEN 1 ELSE 0 END,
+                last_price = CASE WHEN excluded.last_seen >= last_seen
+                                  THEN excluded.last_price ELSE last_price END,
+                last_original_price = CASE WHEN excluded.last_seen >= last_seen
+                                           THEN excluded.last_original_price ELSE last_original_price END,
+                first_seen = MIN(first_seen, excluded.first_seen),
+                last_seen = MAX(last_seen, excluded.last_seen)
+        """, rows)
+
+    async def _save_price_changes(self, db: aiosqlite.Connection, products: List[Product], observed_at: str) -> None:
+        """Gravar ponto de preço só para quem mudou e atualizar os dados do produto"""
+        # Compara com o último preço conhecido antes de atualizar product_info
+        await db.executemany("""
+            INSERT OR REPLACE INTO price_points (product_id, observed_at, price, original_price)
+            SELECT ?1, ?2, ?3, ?4
+            WHERE NOT EXISTS (
+                SELECT 1 FROM product_info
+                WHERE product_id = ?1 AND last_price IS ?3 AND last_original_price IS ?4
+            )
+        """, [
+            (product.product_id, observed_at, product.price, product.original_price)
+            for product in products
+        ])
+
+        await db.executemany("""
+            INSERT INTO product_info
+            (product_id, name, url, last_price, last_original_price, first_seen, last_seen)
+            VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?6)
+            ON CONFLICT (product_id) DO UPDATE SET
+                name = excluded.name,
+                url = excluded.url,
+                last_price = excluded.last_price,
+                last_original_price = excluded.last_original_price,
+                last_seen = excluded.last_seen
+            WHERE excluded.last_seen >= product_info.last_seen
+        """, [
+            (product.product_id, product.name, product.url, product.price, product.original_price, observed_at)
+            for product in products
+        ])
+
+    def history_writer(self) -> "HistoryWriter":
+        """Writer bufferizado do histórico, compartilhado por este cache"""
+        if self._history_writer is None:
+            self._history_writer = HistoryWriter(self)
+        return self._history_writer
+
     async def get_price_history(self, product_id: str, days: int = 30) -> List[Dict[str, Any]]:
-        """Recuperar histórico de preços de um produto"""
+        """Recuperar histórico de preços de um produto (mais recente primeiro).
+
+        Com histórico só de mudanças, a série é reconstruída: pontos de mudança na
+        janela, o preço vigente no início da janela e a última vez em que foi visto.
+        """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            db = await self._connection()
+            async with db.execute("SELECT datetime('now', ?)", (f"-{int(days)} days",)) as cursor:
+                since = (await cursor.fetchone())[0]
+
+            history = []
+
+            # Linhas completas (HISTORY_MODE = 'full' e dados antigos)
+            async with db.execute("""
+                SELECT name, price, original_price, scraped_at
+                FROM product_history
+                WHERE product_id = ? AND scraped_at > ?
+                ORDER BY scraped_at DESC
+            """, (product_id, since)) as cursor:
+                for name, price, original_price, scraped_at in await cursor.fetchall():
+                    history.append(self._history_entry(name, price, original_price, scraped_at))
+
+            async with db.execute("""
+                SELECT name, last_seen FROM product_info WHERE product_id = ?
+            """, (product_id,)) as cursor:
+                info = await cursor.fetchone()
+
+            if info:
+                name, last_seen = info
                 async with db.execute("""
-                    SELECT name, price, original_price, scraped_at 
-                    FROM product_history 
-                    WHERE product_id = ? AND scraped_at > datetime('now', '-{} days')
-                    ORDER BY scraped_at DESC
-                """.format(days), (product_id,)) as cursor:
-                    
-                    rows = await cursor.fetchall()
-                    
-                    history = []
-                    for row in rows:
-                        name, price, original_price, scraped_at = row
-                        history.append({
-                            'name': name,
-                            'price': price,
-                            'original_price': original_price,
-                            'scraped_at': scraped_at
-                        })
-                    
-                    return history
-                    
+                    SELECT price, original_price, observed_at FROM price_points
+                    WHERE product_id = ? AND observed_at > ?
+                    ORDER BY observed_at DESC
+                """, (product_id, since)) as cursor:
+                    points = await cursor.fetchall()
+
+                async with db.execute("""
+                    SELECT price, original_price FROM price_points
+                    WHERE product_id = ? AND observed_at <= ?
+                    ORDER BY observed_at DESC LIMIT 1
+                """, (product_id, since)) as cursor:
+                    in_effect = await cursor.fetchone()
+
+                latest = points[0] if points else in_effect
+                if latest and last_seen > since and (not points or last_seen > points[0][2]):
+                    # Preço confirmado até a última coleta
+                    history.append(self._history_entry(name, latest[0], latest[1], last_seen))
+
+                for price, original_price, observed_at in points:
+                    history.append(self._history_entry(name, price, original_price, observed_at))
+
+                if in_effect:
+                    # Preço que já valia quando a janela começou
+                    history.append(self._history_entry(name, in_effect[0], in_effect[1], since))
+
+            history.sort(key=lambda entry: entry['scraped_at'], reverse=True)
+            return history
+
         except Exception as e:
             print(f"⚠️ Erro ao recuperar histórico: {e}")
             return []
-    
+
+    @staticmethod
+    def _history_entry(name: str, price: Optional[float], original_price: Optional[float], scraped_at: str) -> Dict[str, Any]:
+        return {
+            'name': name,
+            'price': price,
+            'original_price': original_price,
+            'scraped_at': scraped_at
+        }
+
+    async def get_price_stats(self, product_ids: Optional[List[str]] = None,
+                              days: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Estatísticas de preço por produto: mínimo, máximo, média, último e queda desde o máximo.
+
+        Sem days, lê o resumo mantido a cada coleta (todo o período). Com days,
+        calcula na janela com funções de janela do SQL, incluindo o preço que já
+        valia no início da janela. Os dois caminhos
+        devolvem o mesmo: avg_price é ponderada pelo tempo (cada preço vale até o
+        próximo ponto ou até a última coleta, então coletas repetidas e pontos de
+        mudança dão a mesma média) e observations conta períodos de preço, isto
+        é, mudanças de preço mais o preço inicial.
+        """
+        ids_json = json.dumps(product_ids) if product_ids is not None else None
+
+        with get_tracer().span('price_stats', 'cache', products=len(product_ids) if product_ids else None, days=days):
+            try:
+                db = await self._connection()
+                if days is None:
+                    query, params = """
+                        SELECT product_id, min_price, max_price,
+                               CASE WHEN weighted_days > 0 THEN weighted_sum / weighted_days ELSE last_price END,
+                               price_periods, last_price, last_original_price, last_seen
+                        FROM price_summary
+                        WHERE ?1 IS NULL OR product_id IN (SELECT value FROM json_each(?1))
+                    """, (ids_json,)
+                else:
+                    query, params = self._windowed_stats_query(), (ids_json, f"-{int(days)} days")
+
+                async with db.execute(query, params) as cursor:
+                    rows = await cursor.fetchall()
+
+                stats = {}
+                for product_id, min_price, max_price, avg_price, count, last_price, last_original, last_seen in rows:
+                    stats[product_id] = {
+                        'min_price': min_price,
+                        'max_price': max_price,
+                        'avg_price': round(avg_price, 2) if avg_price is not None else None,
+                        'observations': count,
+                        'last_price': last_price,
+                        'last_original_price': last_original,
+                        'last_seen': last_seen,
+                        'drop_from_max_pct': self._percent_below(last_price, max_price),
+                    }
+                return stats
+
+            except Exception as e:
+                print(f"⚠️ Erro ao calcular estatísticas de preço: {e}")
+                return {}
+
+    @staticmethod
+    def _windowed_stats_query() -> str:
+        """SQL das estatísticas por produto numa janela (?1 = ids em JSON ou NULL, ?2 = '-N days')"""
+        return """
+            WITH bounds AS (SELECT datetime('now', ?2) AS since),
+            series AS (
+                SELECT product_id, price, original_price, scraped_at AS observed_at
+                FROM product_history, bounds
+                WHERE scraped_at > since AND product_id IS NOT NULL AND price IS NOT NULL
+                UNION ALL
+                SELECT product_id, price, original_price, observed_at
+                FROM price_points, bounds
+                WHERE observed_at > since AND price IS NOT NULL
+                UNION ALL
+                -- Preço vigente no início da janela: conta desde o início, nos dois modos
+                SELECT product_id, price, original_price, since
+                FROM (
+                    SELECT product_id, price, original_price,
+                           ROW_NUMBER() OVER (PARTITION BY product_id ORDER BY observed_at DESC) AS rn
+                    FROM (
+                        SELECT product_id, price, original_price, scraped_at AS observed_at
+                        FROM product_history, bounds
+                        WHERE scraped_at <= since AND product_id IS NOT NULL AND price IS NOT NULL
+                        UNION ALL
+                        SELECT product_id, price, original_price, observed_at
+                        FROM price_points, bounds
+                        WHERE observed_at <= since AND price IS NOT NULL
+                    )
+                ), bounds
+                WHERE rn = 1
+            ),
+            periods AS (
+                SELECT series.product_id, price, original_price, observed_at,
+                       LAG(price) OVER by_time AS previous_price,
+                       -- Cada preço vale até o próximo ponto; o último, até a última coleta
+                       COALESCE(LEAD(observed_at) OVER by_time,
+                                MAX(observed_at, COALESCE(product_info.last_seen, observed_at))) AS held_until,
+                       ROW_NUMBER() OVER (PARTITION BY series.product_id ORDER BY observed_at DESC) AS rn
+                FROM series LEFT JOIN product_info ON product_info.product_id = series.product_id
+                WHERE ?1 IS NULL OR series.product_id IN (SELECT value FROM json_each(?1))
+                WINDOW by_time AS (PARTITION BY series.product_id ORDER BY observed_at)
+            ),
+            weighted AS (
+                SELECT *, julianday(held_until) - julianday(observed_at) AS held_days FROM periods
+            )
+            SELECT product_id, MIN(price), MAX(price),
+                   -- Um único instante (sem duração) fica com o último preço, como no resumo
+                   CASE WHEN SUM(held_days) > 0 THEN SUM(price * held_days) / SUM(held_days)
+                        ELSE MAX(CASE WHEN rn = 1 THEN price END) END,
+                   SUM(previous_price IS NULL OR price <> previous_price),
+                   MAX(CASE WHEN rn = 1 THEN price END),
+                   MAX(CASE WHEN rn = 1 THEN original_price END),
+                   MAX(CASE WHEN rn = 1 THEN held_until END)
+            FROM weighted
+            GROUP BY product_id
+        """
+
+    @staticmethod
+    def _percent_below(price: Optional[float], reference: Optional[float]) -> Optional[float]:
+        """Quanto price está abaixo de reference, em %"""
+        if not price or not reference:
+            return None
+        return round((reference - price) / reference * 100, 2)
+
+    async def analyze_discounts(self, products: List[Product], days: int = 30) -> Dict[str, Dict[str, Any]]:
+        """Dizer se o desconto anunciado de cada produto é real, comparando com o histórico.
+
+        Desconto real: preço atual ao menos REAL_DISCOUNT_MIN_PCT abaixo da média da
+        janela (ponderada pelo tempo em que cada preço valeu).
+        Preço "de" inflado: original_price acima do maior preço já visto na janela.
+        """
+        ids = [product.product_id for product in products if product.product_id]
+        stats = await self.get_price_stats(ids, days=days) if ids else {}
+
+        analysis = {}
+        for product in products:
+            window = stats.get(product.product_id)
+            if not window or not product.price:
+                continue
+
+            below_avg = self._percent_below(product.price, window['avg_price'])
+            analysis[product.product_id] = {
+                **window,
+                'current_price': product.price,
+                'drop_from_max_pct': self._percent_below(product.price, window['max_price']),
+                'below_avg_pct': below_avg,
+                'real_discount': below_avg is not None and below_avg >= ScraperConfig.REAL_DISCOUNT_MIN_PCT,
+                'inflated_original': bool(product.original_price and window['max_price']
+                                          and product.original_price > window['max_price'] * 1.01),
+            }
+        return analysis
+
     async def update_selector_performance(self, selector: str, selector_type: str, success: bool) -> None:
-        """Atualizar performance de um seletor"""
+        """Atualizar performance de um seletor (upsert em um único statement)"""
+        async def write(db):
+            await db.execute("""
+                INSERT INTO selector_performance
+                (selector, selector_type, success_count, total_attempts, last_used)
+                VALUES (?, ?, ?, 1, datetime('now'))
+                ON CONFLICT (selector, selector_type) DO UPDATE SET
+                    success_count = success_count + excluded.success_count,
+                    total_attempts = total_attempts + 1,
+                    last_used = excluded.last_used
+            """, (selector, selector_type, 1 if success else 0))
+
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Verificar se seletor já existe
-                async with db.execute("""
-                    SELECT success_count, total_attempts FROM selector_performance 
-                    WHERE selector = ? AND selector_type = ?
-                """, (selector, selector_type)) as cursor:
-                    
-                    row = await cursor.fetchone()
-                    
-                    if row:
-                        success_count, total_attempts = row
-                        new_success = success_count + (1 if success else 0)
-                        new_total = total_attempts + 1
-                        
-                        await db.execute("""
-                            UPDATE selector_performance 
-                            SET success_count = ?, total_attempts = ?, last_used = datetime('now')
-                            WHERE selector = ? AND selector_type = ?
-                        """, (new_success, new_total, selector, selector_type))
-                    else:
-                        await db.execute("""
-                            INSERT INTO selector_performance 
-                            (selector, selector_type, success_count, total_attempts)
-                            VALUES (?, ?, ?, 1)
-                        """, (selector, selector_type, 1 if success else 0))
-                
-                await db.commit()
-                
+            await self._write(write, 'selector_performance')
+
         except Exception as e:
             print(f"⚠️ Erro ao atualizar performance: {e}")
-    
+
     async def get_best_selectors(self, selector_type: str, min_attempts: int = 5) -> List[Dict[str, Any]]:
         """Recuperar os melhores seletores por tipo"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute("""
-                    SELECT selector, success_count, total_attempts,
-                           CAST(success_count AS FLOAT) / total_attempts as success_rate
-                    FROM selector_performance 
-                    WHERE selector_type = ? AND total_attempts >= ?
-                    ORDER BY success_rate DESC, total_attempts DESC
-                    LIMIT 10
-                """, (selector_type, min_attempts)) as cursor:
-                    
-                    rows = await cursor.fetchall()
-                    
-                    selectors = []
-                    for row in rows:
-                        selector, success_count, total_attempts, success_rate = row
-                        selectors.append({
-                            'selector': selector,
-                            'success_count': success_count,
-                            'total_attempts': total_attempts,
-                            'success_rate': success_rate
-                        })
-                    
-                    return selectors
-                    
+            db = await self._connection()
+            async with db.execute("""
+                SELECT selector, success_count, total_attempts,
+                       CAST(success_count AS FLOAT) / total_attempts as success_rate
+                FROM selector_performance
+                WHERE selector_type = ? AND total_attempts >= ?
+                ORDER BY success_rate DESC, total_attempts DESC
+                LIMIT 10
+            """, (selector_type, min_attempts)) as cursor:
+                rows = await cursor.fetchall()
+
+            selectors = []
+            for row in rows:
+                selector, success_count, total_attempts, success_rate = row
+                selectors.append({
+                    'selector': selector,
+                    'success_count': success_count,
+                    'total_attempts': total_attempts,
+                    'success_rate': success_rate
+                })
+
+            return selectors
+
         except Exception as e:
             print(f"⚠️ Erro ao recuperar seletores: {e}")
             return []
-    
-    async def cleanup_old_cache(self, days_old: int = 7) -> None:
-        """Limpar cache antigo"""
+
+    async def get_category(self, product_key: str) -> Optional[Tuple[Optional[str], float]]:
+        """Categoria persistida de um produto ((None, 0.0) = negativo ainda válido)"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                # Remover cache expirado
-                await db.execute("""
-                    DELETE FROM search_cache 
-                    WHERE expires_at < datetime('now')
-                """)
-                
-                # Remover histórico muito antigo
-                await db.execute("""
-                    DELETE FROM product_history 
-                    WHERE scraped_at < datetime('now', '-{} days')
-                """.format(days_old))
-                
-                await db.commit()
-                print("🧹 Cache antigo limpo")
-                
+            db = await self._connection()
+            async with db.execute("""
+                SELECT category, confidence FROM category_cache
+                WHERE product_key = ? AND expires_at > datetime('now')
+            """, (product_key,)) as cursor:
+                row = await cursor.fetchone()
+            return (row[0], row[1] or 0.0) if row else None
+
+        except Exception as e:
+            get_cache_metrics('category').error()
+            print(f"⚠️ Erro ao ler categoria: {e}")
+            return None
+
+    async def load_hot_categories(self, limit: Optional[int] = None) -> Dict[str, Tuple[Optional[str], float]]:
+        """Categorias mais usadas ainda válidas, para pré-carregar na engine"""
+        limit = limit or ScraperConfig.CATEGORY_PRELOAD_LIMIT
+        try:
+            db = await self._connection()
+            async with db.execute("""
+                SELECT product_key, category, confidence FROM category_cache
+                WHERE expires_at > datetime('now')
+                ORDER BY hits DESC, updated_at DESC
+                LIMIT ?
+            """, (limit,)) as cursor:
+                rows = await cursor.fetchall()
+            return {key: (category, confidence or 0.0) for key, category, confidence in rows}
+
+        except Exception as e:
+            print(f"⚠️ Erro ao pré-carregar categorias: {e}")
+            return {}
+
+    async def save_categories(self, categories: Dict[str, Tuple[Optional[str], float]],
+                              hits: Optional[Dict[str, int]] = None) -> None:
+        """Gravar categorias descobertas e contar reutilizações (uma transação)"""
+        if not categories and not hits:
+            return
+
+        positive_ttl = f"+{int(ScraperConfig.CATEGORY_CACHE_TTL)} seconds"
+        negative_ttl = f"+{int(ScraperConfig.CATEGORY_NEGATIVE_TTL)} seconds"
+
+        metrics = get_cache_metrics('category')
+        with get_tracer().span('cache_write', 'cache', table='category_cache', products=len(categories)), metrics.timed('put'):
+            async def write(db):
+                await db.executemany("""
+                    INSERT INTO category_cache (product_key, category, confidence, updated_at, expires_at)
+                    VALUES (?, ?, ?, datetime('now'), datetime('now', ?))
+                    ON CONFLICT (product_key) DO UPDATE SET
+                        category = excluded.category,
+                        confidence = excluded.confidence,
+                        updated_at = excluded.updated_at,
+                        expires_at = excluded.expires_at
+                """, [
+                    (key, category, confidence, positive_ttl if category else negative_ttl)
+                    for key, (category, confidence) in categories.items()
+                ])
+
+                if hits:
+                    await db.executemany("""
+                        UPDATE category_cache SET hits = hits + ? WHERE product_key = ?
+                    """, [(count, key) for key, count in hits.items()])
+
+            try:
+                await self._write(write, 'category_cache')
+                metrics.stored(sum(len(key) + len(category or '') for key, (category, _) in categories.items()))
+
+            except Exception as e:
+                metrics.error()
+                print(f"⚠️ Erro ao salvar categorias: {e}")
+
+    async def get_affiliate_links(self, product_keys: List[str]) -> Dict[str, str]:
+        """Links de afiliado ainda válidos para as chaves pedidas (canonical.product_key)"""
+        metrics = get_cache_metrics('affiliate')
+        keys = list(dict.fromkeys(product_keys))
+        if not keys:
+            return {}
+        if ScraperConfig.AFFILIATE_CACHE_TTL <= 0:
+            # Reaproveitamento desligado: todo link volta ao gerador
+            metrics.miss(len(keys))
+            return {}
+
+        with metrics.timed('get'):
+            try:
+                db = await self._connection()
+                async with db.execute("""
+                    SELECT product_key, affiliate_url FROM affiliate_links
+                    WHERE product_key IN (SELECT value FROM json_each(?))
+                      AND expires_at > datetime('now')
+                """, (json.dumps(keys),)) as cursor:
+                    links = dict(await cursor.fetchall())
+
+            except Exception as e:
+                metrics.error()
+                print(f"⚠️ Erro ao ler links de afiliado: {e}")
+                links = {}
+
+        metrics.hit(len(links))
+        metrics.miss(len(keys) - len(links))
+        return links
+
+    async def save_affiliate_links(self, links: Dict[str, str]) -> None:
+        """Gravar links de afiliado recém-gerados (chave do produto -> link)"""
+        if not links or ScraperConfig.AFFILIATE_CACHE_TTL <= 0:
+            return
+
+        ttl = f"+{int(ScraperConfig.AFFILIATE_CACHE_TTL)} seconds"
+        metrics = get_cache_metrics('affiliate')
+
+        with get_tracer().span('cache_write', 'cache', table='affiliate_links', products=len(links)), metrics.timed('put'):
+            async def write(db):
+                await db.executemany("""
+                    INSERT INTO affiliate_links (product_key, affiliate_url, created_at, expires_at)
+                    VALUES (?, ?, datetime('now'), datetime('now', ?))
+                    ON CONFLICT (product_key) DO UPDATE SET
+                        affiliate_url = excluded.affiliate_url,
+                        created_at = excluded.created_at,
+                        expires_at = excluded.expires_at
+                """, [(key, url, ttl) for key, url in links.items()])
+
+                # A chave canônica do produto é o product_id do catálogo
+                await db.executemany("""
+                    UPDATE products SET affiliate_url = ? WHERE product_id = ?
+                """, [(url, key) for key, url in links.items()])
+
+            try:
+                await self._write(write, 'affiliate_links')
+                metrics.stored(sum(len(key) + len(url) for key, url in links.items()))
+
+            except Exception as e:
+                metrics.error()
+                print(f"⚠️ Erro ao salvar links de afiliado: {e}")
+
+    async def cleanup_old_cache(self, days_old: int = 7) -> Dict[str, int]:
+        """Limpar buscas vencidas e histórico completo mais antigo que days_old
+        (em lotes curtos, sem segurar o lock de escrita)"""
+        try:
+            db = await self._connection()
+            now, cutoff = await self._retention_cutoff(db, days_old)
+            rows = await self._delete_expired_history(db, now, cutoff)
+            print(f"🧹 Cache antigo limpo: {sum(rows.values())} linhas")
+            return rows
+
         except Exception as e:
             print(f"⚠️ Erro ao limpar cache: {e}")
-    
+            return {}
+
+    async def run_retention(self, days_old: Optional[int] = None,
+                            catalog_days: Optional[int] = None) -> Dict[str, Any]:
+        """Remover dados vencidos em lotes, devolver páginas livres ao disco e
+        atualizar estatísticas do planner. Retorna linhas e bytes recuperados.
+
+        days_old vale para o histórico e os caches com validade. O catálogo
+        (products/product_info, com os links de afiliado) tem retenção própria,
+        bem mais longa: catalog_days (padrão CACHE_CATALOG_RETENTION_DAYS, 0 = nunca).
+        Cada lote é uma escrita curta no CacheWriter, intercalada com as demais
+        escritas; nunca roda VACUUM completo (ver vacuum())."""
+        if days_old is None:
+            days_old = ScraperConfig.CACHE_RETENTION_DAYS
+        if catalog_days is None:
+            catalog_days = ScraperConfig.CACHE_CATALOG_RETENTION_DAYS
+        started = time.perf_counter()
+        report: Dict[str, Any] = {'rows': {}}
+
+        with get_tracer().span('cache_retention', 'cache', days_old=days_old, catalog_days=catalog_days) as span:
+            try:
+                db = await self._connection()
+                bytes_before = await self._database_bytes(db)
+                now, cutoff = await self._retention_cutoff(db, days_old)
+
+                rows = report['rows']
+                rows.update(await self._delete_expired_history(db, now, cutoff))
+                rows['category_cache'] = await self._delete_key_batches(
+                    'category_cache', 'product_key', 'expires_at < ?', (now,))
+                # Pontos antigos, mantendo o preço vigente no corte
+                rows['price_points'] = await self._delete_key_batches(
+                    'price_points', 'product_id, observed_at', """
+                        observed_at < (
+                            SELECT MAX(p.observed_at) FROM price_points p
+                            WHERE p.product_id = price_points.product_id AND p.observed_at <= ?1)
+                    """, (cutoff,))
+
+                if catalog_days:
+                    rows.update(await self._prune_catalog(db, catalog_days))
+
+                await self._reclaim_space(db)
+
+                report['rows_total'] = sum(rows.values())
+                report['bytes_before'] = bytes_before
+                report['bytes_after'] = await self._database_bytes(db)
+                report['bytes_reclaimed'] = max(0, bytes_before - report['bytes_after'])
+                report['seconds'] = round(time.perf_counter() - started, 3)
+                span.set(rows=report['rows_total'], bytes_reclaimed=report['bytes_reclaimed'])
+
+                print(f"🧹 Cache antigo limpo: {report['rows_total']} linhas, "
+                      f"{report['bytes_reclaimed'] / 1024 / 1024:.1f} MB recuperados em {report['seconds']:.1f}s")
+
+            except Exception as e:
+                report['error'] = str(e)
+                print(f"⚠️ Erro ao limpar cache: {e}")
+
+        return report
+
+    async def _retention_cutoff(self, db: aiosqlite.Connection, days_old: int) -> Tuple[str, str]:
+        """(agora, agora - days_old) no relógio do SQLite"""
+        async with db.execute("SELECT datetime('now'), datetime('now', ?)", (f"-{int(days_old)} days",)) as cursor:
+            return await cursor.fetchone()
+
+    async def _delete_expired_history(self, db: aiosqlite.Connection, now: str, cutoff: str) -> Dict[str, int]:
+        """Buscas vencidas e linhas completas do histórico anteriores ao corte"""
+        return {
+            'search_cache': await self._delete_rowid_batches(db, 'search_cache', 'expires_at < ?', (now,)),
+            'product_history': await self._delete_rowid_batches(db, 'product_history', 'scraped_at < ?', (cutoff,)),
+        }
+
+    async def _prune_catalog(self, db: aiosqlite.Connection, catalog_days: int) -> Dict[str, int]:
+        """Produtos sem coleta há mais de catalog_days (com seus pontos de preço)
+        e links de afiliado vencidos"""
+        now, cutoff = await self._retention_cutoff(db, catalog_days)
+        rows = {
+            'product_info': await self._delete_key_batches('product_info', 'product_id', 'last_seen < ?', (cutoff,)),
+            'products': await self._delete_key_batches('products', 'product_id', 'last_seen < ?', (cutoff,)),
+            'affiliate_links': await self._delete_key_batches(
+                'affiliate_links', 'product_key', 'expires_at < ?', (now,)),
+        }
+        rows['price_points_orphaned'] = await self._delete_key_batches(
+            'price_points', 'product_id, observed_at',
+            'product_id NOT IN (SELECT product_id FROM product_info)')
+        return rows
+
+    async def _delete_rowid_batches(self, db: aiosqlite.Connection, table: str, condition: str,
+                                    params: Tuple = ()) -> int:
+        """DELETE em faixas de rowid, uma escrita do CacheWriter por faixa
+        (a faixa é lida na conexão de leitura)"""
+        batch = ScraperConfig.CACHE_DELETE_BATCH
+        async with db.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table} WHERE {condition}", params) as cursor:
+            low, high = await cursor.fetchone()
+        if low is None:
+            return 0
+
+        deleted = 0
+        for start in range(low, high + 1, batch):
+            async def delete(db, start=start):
+                cursor = await db.execute(
+                    f"DELETE FROM {table} WHERE rowid >= ? AND rowid < ? AND ({condition})",
+                    (start, start + batch) + tuple(params)
+                )
+                return cursor.rowcount
+
+            deleted += await self._write(delete, f'retenção {table}')
+            await asyncio.sleep(0)  # Deixa outras tarefas (e escritores) entrarem
+        return deleted
+
+    async def _delete_key_batches(self, table: str, key: str, condition: str, params: Tuple = ()) -> int:
+        """DELETE em lotes pela chave primária (tabelas WITHOUT ROWID), via CacheWriter"""
+        batch = ScraperConfig.CACHE_DELETE_BATCH
+        deleted = 0
+
+        async def delete(db):
+            cursor = await db.execute(
+                f"DELETE FROM {table} WHERE ({key}) IN (SELECT {key} FROM {table} WHERE {condition} LIMIT {int(batch)})",
+                params
+            )
+            return cursor.rowcount
+
+        while True:
+            rowcount = await self._write(delete, f'retenção {table}')
+            deleted += rowcount
+            if rowcount < batch:
+                return deleted
+            await asyncio.sleep(0)
+
+    async def _reclaim_space(self, db: aiosqlite.Connection) -> None:
+        """Devolver páginas livres ao sistema de arquivos e otimizar o planner"""
+        async with db.execute("PRAGMA auto_vacuum") as cursor:
+            auto_vacuum = (await cursor.fetchone())[0]
+
+        if auto_vacuum != 2:
+            # Banco criado antes do modo incremental: as páginas livres ficam para
+            # reuso; a conversão (VACUUM completo) só roda quando pedida
+            print("💡 Cache sem auto_vacuum incremental: rode 'python main.py --vacuum' para devolver o espaço ao disco")
+        else:
+            async def vacuum_step(db):
+                # Cada linha lida libera uma página: consumir o cursor antes do fim da operação
+                async with db.execute(f"PRAGMA incremental_vacuum({int(ScraperConfig.CACHE_VACUUM_PAGES)})") as cursor:
+                    await cursor.fetchall()
+
+            while True:
+                async with db.execute("PRAGMA freelist_count") as cursor:
+                    free_pages = (await cursor.fetchone())[0]
+                if not free_pages:
+                    break
+                await self._write(vacuum_step, 'incremental_vacuum')
+                await asyncio.sleep(0)
+
+        async def optimize(db):
+            async with db.execute("PRAGMA optimize") as cursor:
+                await cursor.fetchall()
+
+        # optimize pode rodar ANALYZE (escrita): também passa pelo CacheWriter
+        await self._write(optimize, 'optimize')
+        # Encolher o -wal, que cresce até o maior lote gravado
+        await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    async def _database_bytes(self, db: aiosqlite.Connection) -> int:
+        """Tamanho em disco do banco, incluindo o arquivo -wal"""
+        async with db.execute("PRAGMA page_count") as cursor:
+            page_count = (await cursor.fetchone())[0]
+        async with db.execute("PRAGMA page_size") as cursor:
+            page_size = (await cursor.fetchone())[0]
+
+        wal_path = self.db_path.with_name(self.db_path.name + "-wal")
+        wal_bytes = wal_path.stat().st_size if wal_path.exists() else 0
+        return page_count * page_size + wal_bytes
+
+    async def vacuum(self) -> Dict[str, Any]:
+        """Compactar o banco com VACUUM completo, convertendo-o para auto_vacuum
+        incremental (bancos criados antes dele). Reescreve o arquivo inteiro e
+        bloqueia as escritas de todos os processos enquanto roda: só é chamado
+        explicitamente (main.py --vacuum), nunca pela retenção automática."""
+        started = time.perf_counter()
+        with get_tracer().span('cache_vacuum', 'cache') as span:
+            # Nada pendente no writer nem transação aberta na conexão de leitura
+            await self.history_writer().flush()
+            db = await self._connection()
+            bytes_before = await self._database_bytes(db)
+
+            async def run():
+                await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                await db.execute("VACUUM")
+
+            print("🗜️ Compactando o cache (VACUUM completo)...")
+            await self._retry_busy(run, 'vacuum')
+            await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+            bytes_after = await self._database_bytes(db)
+            report = {
+                'bytes_before': bytes_before,
+                'bytes_after': bytes_after,
+                'bytes_reclaimed': max(0, bytes_before - bytes_after),
+                'seconds': round(time.perf_counter() - started, 3),
+            }
+            span.set(bytes_reclaimed=report['bytes_reclaimed'])
+
+        print(f"🗜️ Cache compactado: {report['bytes_reclaimed'] / 1024 / 1024:.1f} MB recuperados "
+              f"em {report['seconds']:.1f}s")
+        return report
+
+    async def run_retention_if_due(self, interval: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Rodar a retenção se a última execução (registrada no banco) já passou do intervalo"""
+        if interval is None:
+            interval = ScraperConfig.CACHE_RETENTION_INTERVAL
+
+        async def claim(db) -> bool:
+            # Verificar e marcar na mesma transação (BEGIN IMMEDIATE do writer):
+            # com vários processos, só um deles roda a retenção
+            async with db.execute("""
+                SELECT 1 FROM cache_meta
+                WHERE key = 'last_retention' AND value > datetime('now', ?)
+            """, (f"-{int(interval)} seconds",)) as cursor:
+                if await cursor.fetchone():
+                    return False
+
+            await db.execute("""
+                INSERT INTO cache_meta (key, value) VALUES ('last_retention', datetime('now'))
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value
+            """)
+            return True
+
+        try:
+            if not await self._write(claim, 'cache_meta'):
+                return None
+
+        except Exception as e:
+            print(f"⚠️ Erro ao agendar limpeza do cache: {e}")
+            return None
+
+        return await self.run_retention()
+
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Obter estatísticas do cache"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                stats = {}
-                
-                # Estatísticas de cache
-                async with db.execute("SELECT COUNT(*) FROM search_cache") as cursor:
-                    row = await cursor.fetchone()
-                    stats['total_cached_searches'] = row[0] if row else 0
-                
-                async with db.execute("""
-                    SELECT COUNT(*) FROM search_cache 
-                    WHERE expires_at > datetime('now')
-                """) as cursor:
-                    row = await cursor.fetchone()
-                    stats['valid_cached_searches'] = row[0] if row else 0
-                
-                # Estatísticas de histórico
-                async with db.execute("SELECT COUNT(*) FROM product_history") as cursor:
-                    row = await cursor.fetchone()
-                    stats['total_products_tracked'] = row[0] if row else 0
-                
-                async with db.execute("""
-                    SELECT COUNT(DISTINCT product_id) FROM product_history
-                """) as cursor:
-                    row = await cursor.fetchone()
-                    stats['unique_products'] = row[0] if row else 0
-                
-                return stats
-                
+            db = await self._connection()
+            stats = {}
+
+            # Estatísticas de cache
+            async with db.execute("SELECT COUNT(*) FROM search_cache") as cursor:
+                row = await cursor.fetchone()
+                stats['total_cached_searches'] = row[0] if row else 0
+
+            async with db.execute("""
+                SELECT COUNT(*) FROM search_cache
+                WHERE expires_at > datetime('now')
+            """) as cursor:
+                row = await cursor.fetchone()
+                stats['valid_cached_searches'] = row[0] if row else 0
+
+            # Estatísticas de histórico (linhas completas + pontos de mudança)
+            async with db.execute("""
+                SELECT (SELECT COUNT(*) FROM product_history) + (SELECT COUNT(*) FROM price_points)
+            """) as cursor:
+                row = await cursor.fetchone()
+                stats['total_products_tracked'] = row[0] if row else 0
+
+            async with db.execute("""
+                SELECT COUNT(*) FROM (
+                    SELECT product_id FROM product_history WHERE product_id IS NOT NULL
+                    UNION
+                    SELECT product_id FROM product_info
+                )
+            """) as cursor:
+                row = await cursor.fetchone()
+                stats['unique_products'] = row[0] if row else 0
+
+            async with db.execute("""
+                SELECT COUNT(*) FROM affiliate_links WHERE expires_at > datetime('now')
+            """) as cursor:
+                row = await cursor.fetchone()
+                stats['cached_affiliate_links'] = row[0] if row else 0
+
+            async with db.execute("SELECT COUNT(*) FROM products") as cursor:
+                row = await cursor.fetchone()
+                stats['catalog_products'] = row[0] if row else 0
+
+            stats['memory'] = self.memory.stats()
+            stats['metrics'] = cache_metrics_snapshot()
+            if self._writer is not None:
+                stats['writer'] = self._writer.stats()
+            return stats
+
         except Exception as e:
             print(f"⚠️ Erro ao obter estatísticas: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+class CacheWriter:
+    """Tarefa única de escrita: fila assíncrona cujas operações pendentes são
+    agrupadas numa só transação (um SAVEPOINT por operação isola falhas)"""
+
+    def __init__(self, cache: ScraperCache, max_group: Optional[int] = None):
+        self.cache = cache
+        self.max_group = max_group or ScraperConfig.CACHE_WRITE_GROUP
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.transactions = 0
+        self.operations = 0
+        self.lock_waits: deque = deque(maxlen=1000)  # Espera pelo BEGIN IMMEDIATE (s), por grupo
+
+    async def start(self) -> None:
+        """Abrir a conexão de escrita e iniciar a tarefa"""
+        self._db = await self.cache._open_connection()
+        self._task = asyncio.create_task(self._run(), name='cache-writer')
+
+    async def submit(self, operation, label: str = 'write'):
+        """Enfileirar operação e aguardar o commit do grupo em que ela entrou"""
+        if self._task is None or self._task.done():
+            raise RuntimeError("CacheWriter não está em execução")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, label, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Consumir a fila: cada rodada grava tudo o que já estiver esperando"""
+        stopping = False
+        while not stopping:
+            job = await self._queue.get()
+            if job is None:
+                break
+
+            # Deixar quem já está pronto para escrever entrar neste grupo
+            await asyncio.sleep(0)
+
+            jobs = [job]
+            while len(jobs) < self.max_group:
+                try:
+                    job = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                jobs.append(job)
+
+            await self._commit_group(jobs)
+
+    async def _commit_group(self, jobs: List[Tuple]) -> None:
+        """Executar as operações numa transação e resolver os futures"""
+        db = self._db
+        started = time.perf_counter()
+
+        async def attempt() -> List[Tuple]:
+            # IMMEDIATE pega o lock de escrita já no início: sem upgrade de
+            # leitura para escrita, que falharia sem esperar pelo busy_timeout
+            await db.execute("BEGIN IMMEDIATE")
+            self.lock_waits.append(time.perf_counter() - started)
+            outcomes = []
+            try:
+                for operation, _, future in jobs:
+                    await db.execute("SAVEPOINT operation")
+                    try:
+                        result = await operation(db)
+                        await db.execute("RELEASE operation")
+                        outcomes.append((future, result, None))
+                    except Exception as e:
+                        if is_busy_error(e):
+                            raise
+                        await db.execute("ROLLBACK TO operation")
+                        await db.execute("RELEASE operation")
+                        outcomes.append((future, None, e))
+                await db.commit()
+            except Exception:
+                try:
+                    await db.rollback()
+                except Exception:
+                    pass
+                raise
+            return outcomes
+
+        with get_tracer().span('cache_write_group', 'cache', operations=len(jobs),
+                               labels=','.join(sorted({label for _, label, _ in jobs}))):
+            try:
+                # Com busy o grupo inteiro é refeito: a transação anterior foi desfeita
+                outcomes = await self.cache._retry_busy(attempt, 'escrita')
+            except Exception as e:
+                outcomes = [(future, None, e) for _, _, future in jobs]
+
+        self.transactions += 1
+        self.operations += len(jobs)
+
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Transações, operações e espera pelo lock de escrita (ms)"""
+        waits = [wait * 1000 for wait in self.lock_waits]
+        return {
+            'transactions': self.transactions,
+            'operations': self.operations,
+            'busy_retries': self.cache.busy_retries,
+            'lock_wait_p50_ms': round(percentile(waits, 50), 2),
+            'lock_wait_p95_ms': round(percentile(waits, 95), 2),
+            'lock_wait_max_ms': round(max(waits), 2) if waits else 0.0,
+        }
+
+    async def close(self) -> None:
+        """Gravar o que estiver na fila, parar a tarefa e fechar a conexão"""
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+class HistoryWriter:
+    """Buffer assíncrono do histórico: grava em lote por tamanho ou por tempo"""
+
+    def __init__(self, cache: ScraperCache, max_buffer: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.cache = cache
+        self.max_buffer = max_buffer or ScraperConfig.HISTORY_BATCH_SIZE
+        self.flush_interval = flush_interval or ScraperConfig.HISTORY_FLUSH_INTERVAL
+        self._buffer: List[Product] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def add(self, products: List[Product]) -> None:
+        """Adicionar produtos ao buffer (grava ao atingir max_buffer)"""
+        self._buffer.extend(products)
+
+        if len(self._buffer) >= self.max_buffer:
+            await self.flush()
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Gravar o que estiver no buffer após flush_interval"""
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Gravar todo o buffer numa única transação"""
+        async with self._lock:
+            if not self._buffer:
+                return
+            pending, self._buffer = self._buffer, []
+            await self.cache.save_product_history(pending)
+
+    async def close(self) -> None:
+        """Cancelar o timer e gravar o que restar"""
+        if self._timer and not self._timer.done() and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+        self._timer = None
+        await self.flush()
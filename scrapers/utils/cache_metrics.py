@@ -0,0 +1,192 @@
+"""
+Métricas dos caches (busca, categoria, afiliado): hits, misses, stale,
+erros, latência de get/put em histograma e bytes gravados
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from ..config import ScraperConfig
+
+# Limites superiores dos buckets em ms (o último bucket é "acima de 2500")
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+CACHE_NAMES = ('search', 'category', 'affiliate')
+
+class LatencyHistogram:
+    """Histograma de latência com buckets fixos (memória constante)"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, pct: float) -> float:
+        """Percentil interpolado dentro do bucket, nunca acima do máximo observado"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max_ms
+                value = lower + (upper - lower) * (rank - seen) / count
+                return round(min(value, self.max_ms), 3)
+            seen += count
+        return round(self.max_ms, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"<={bound}ms": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]}ms"] = self.counts[-1]
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.quantile(50),
+            'p95_ms': self.quantile(95),
+            'p99_ms': self.quantile(99),
+            'max_ms': round(self.max_ms, 3),
+            'buckets': buckets,
+        }
+
+class CacheMetrics:
+    """Contadores de um cache; seguro entre threads (uma busca por thread na GUI)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0  # Subconjunto dos hits servidos vencidos (atualizados em segundo plano)
+        self.errors = 0
+        self.bytes_stored = 0
+        self.get_latency = LatencyHistogram()
+        self.put_latency = LatencyHistogram()
+
+    def hit(self, count: int = 1) -> None:
+        with self._lock:
+            self.hits += count
+
+    def miss(self, count: int = 1) -> None:
+        with self._lock:
+            self.misses += count
+
+    def stale(self, count: int = 1) -> None:
+        with self._lock:
+            self.stale_hits += count
+
+    def error(self, count: int = 1) -> None:
+        with self._lock:
+            self.errors += count
+
+    def stored(self, size: int) -> None:
+        with self._lock:
+            self.bytes_stored += size
+
+    @contextmanager
+    def timed(self, operation: str):
+        """Medir um get ou put (conta também quando a operação falha)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            histogram = self.get_latency if operation == 'get' else self.put_latency
+            with self._lock:
+                histogram.observe(elapsed)
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_hits': self.stale_hits,
+                'errors': self.errors,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'bytes_stored': self.bytes_stored,
+                'get': self.get_latency.snapshot(),
+                'put': self.put_latency.snapshot(),
+            }
+
+_registry: Dict[str, CacheMetrics] = {}
+_registry_lock = threading.Lock()
+
+def get_cache_metrics(name: str) -> CacheMetrics:
+    """Métricas do cache `name`, compartilhadas por todo o processo"""
+    metrics = _registry.get(name)
+    if metrics is None:
+        with _registry_lock:
+            metrics = _registry.setdefault(name, CacheMetrics(name))
+    return metrics
+
+def cache_metrics_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Métricas de todos os caches"""
+    return {name: get_cache_metrics(name).snapshot() for name in CACHE_NAMES}
+
+def format_cache_metrics() -> str:
+    """Linha de log com hit ratio e latência p95 de cada cache"""
+    parts = []
+    for name, data in cache_metrics_snapshot().items():
+        lookups = data['hits'] + data['misses']
+        parts.append(
+            f"{name}: {data['hit_ratio']:.0%} de {lookups} "
+            f"(stale {data['stale_hits']}, erros {data['errors']}, "
+            f"get p95 {data['get']['p95_ms']}ms, put p95 {data['put']['p95_ms']}ms, "
+            f"{data['bytes_stored'] / 1024:.0f} KB gravados)"
+        )
+    return "📈 Cache | " + " | ".join(parts)
+
+class CacheMetricsLogger:
+    """Thread de fundo que imprime as métricas periodicamente (só se houve uso)"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or ScraperConfig.CACHE_METRICS_LOG_INTERVAL
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_activity = -1
+
+    def _activity(self) -> int:
+        return sum(
+            get_cache_metrics(name).lookups + get_cache_metrics(name).put_latency.count
+            for name in CACHE_NAMES
+        )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.log()
+
+    def log(self) -> None:
+        activity = self._activity()
+        if activity != self._last_activity:
+            self._last_activity = activity
+            print(format_cache_metrics())
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Parar a thread e imprimir a última linha"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.log()
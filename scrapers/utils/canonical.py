@@ -0,0 +1,58 @@
+"""
+Forma canônica de URLs de produto e termos de busca usada nas chaves de cache
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+# MLB1234567890, MLB-1234567890 e variantes de outros sites (MLA, MLM, ...)
+_PRODUCT_ID = re.compile(r'(?<![A-Za-z])(ML[A-Z])-?(\d{6,})')
+_SPACES = re.compile(r'\s+')
+
+def product_id_from_url(url: Optional[str]) -> Optional[str]:
+    """ID do anúncio/produto no formato MLB123... (caminho tem prioridade sobre a query)"""
+    if not url:
+        return None
+
+    parts = urlsplit(url.strip())
+    for text in (parts.path, parts.query, parts.fragment):
+        match = _PRODUCT_ID.search(text)
+        if match:
+            return match.group(1) + match.group(2)
+    return None
+
+def product_key(url: Optional[str]) -> str:
+    """Chave de cache de um produto: ID do ML ou, sem ID, a URL sem query,
+    fragmento (#polycard_client...) e barra final, com host em minúsculas"""
+    product_id = product_id_from_url(url)
+    if product_id:
+        return product_id
+    if not url:
+        return ''
+
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return parts.path.rstrip('/')
+    return f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+def normalize_term(text: Optional[str]) -> str:
+    """Termo de busca sem acentos, em minúsculas e com espaços únicos
+    ('-' vira espaço, como na URL de busca do ML)"""
+    if not text:
+        return ''
+
+    decomposed = unicodedata.normalize('NFKD', text)
+    plain = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(' ', plain.replace('-', ' ').casefold()).strip()
+
+# Parâmetros de busca que são texto livre digitado pelo usuário
+_TEXT_PARAMS = ('query', 'category')
+
+def canonical_search_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia dos parâmetros de busca com os campos de texto normalizados"""
+    return {
+        name: normalize_term(value) if name in _TEXT_PARAMS and isinstance(value, str) else value
+        for name, value in params.items()
+    }
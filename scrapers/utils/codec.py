@@ -0,0 +1,63 @@
+"""
+Codificação compacta e versionada de listas de produtos para o cache
+"""
+
+import json
+import zlib
+from datetime import datetime
+from typing import List
+
+from .validators import Product
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; json da stdlib produz o mesmo formato
+    orjson = None
+
+CODEC_VERSION = 1
+COMPRESSION_LEVEL = 3  # zlib: bom equilíbrio entre tamanho e velocidade
+
+# Ordem das colunas gravadas; o cabeçalho guarda a lista, então campos novos
+# no modelo não invalidam blobs antigos (ficam com o valor padrão)
+PRODUCT_FIELDS = list(Product.model_fields)
+
+def _dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def encode_products(products: List[Product]) -> bytes:
+    """Produtos -> byte de versão + JSON colunar (campos + linhas) comprimido"""
+    rows = []
+    for product in products:
+        row = [getattr(product, name) for name in PRODUCT_FIELDS]
+        rows.append([value.isoformat() if isinstance(value, datetime) else value for value in row])
+
+    payload = _dumps({'fields': PRODUCT_FIELDS, 'rows': rows})
+    return bytes([CODEC_VERSION]) + zlib.compress(payload, COMPRESSION_LEVEL)
+
+def decode_products(blob: bytes) -> List[Product]:
+    """Blob -> produtos, sem revalidar (os dados foram validados ao gravar)"""
+    if not blob or blob[0] != CODEC_VERSION:
+        raise ValueError(f"Versão de codificação desconhecida: {blob[0] if blob else None}")
+
+    data = _loads(zlib.decompress(blob[1:]))
+    fields = [name for name in data['fields'] if name in Product.model_fields]
+    indexes = [data['fields'].index(name) for name in fields]
+    scraped_at = fields.index('scraped_at') if 'scraped_at' in fields else None
+
+    # Blobs de versões antigas do modelo caem no model_construct dentro de from_trusted
+    from_trusted = Product.from_trusted
+    products = []
+    for row in data['rows']:
+        values = [row[i] for i in indexes]
+        if scraped_at is not None and isinstance(values[scraped_at], str):
+            values[scraped_at] = datetime.fromisoformat(values[scraped_at])
+        products.append(from_trusted(dict(zip(fields, values))))
+
+    return products
@@ -0,0 +1,182 @@
+"""
+Pool de fingerprints de navegador pré-calculados e persistidos em disco
+"""
+
+import json
+import random
+import re
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from ..config import ScraperConfig
+
+@dataclass
+class FingerprintProfile:
+    """Perfil coerente de navegador: User-Agent, Client Hints, plataforma e viewport"""
+
+    user_agent: str
+    platform: str  # Valor de navigator.platform
+    viewport: Dict[str, int]
+    sec_ch_ua: Optional[str] = None
+    sec_ch_ua_platform: Optional[str] = None
+    sec_ch_ua_mobile: str = "?0"
+
+    def client_hint_headers(self) -> Dict[str, str]:
+        """Headers Sec-CH-UA (somente navegadores baseados em Chromium enviam)"""
+        if not self.sec_ch_ua:
+            return {}
+
+        return {
+            'Sec-CH-UA': self.sec_ch_ua,
+            'Sec-CH-UA-Mobile': self.sec_ch_ua_mobile,
+            'Sec-CH-UA-Platform': self.sec_ch_ua_platform,
+        }
+
+class FingerprintPool:
+    """Conjunto de perfis construído uma vez e reutilizado entre execuções"""
+
+    VERSION = 1
+
+    # Resoluções comuns por sistema operacional
+    VIEWPORTS = {
+        'Windows': [(1366, 768), (1920, 1080), (1536, 864), (1600, 900), (1280, 720)],
+        'macOS': [(1440, 900), (1680, 1050), (1280, 800), (1920, 1080)],
+        'Linux': [(1920, 1080), (1366, 768), (1600, 900), (1280, 1024)],
+    }
+
+    # Sistema no UA -> (Sec-CH-UA-Platform, navigator.platform)
+    PLATFORMS = [
+        ('Windows', 'Windows', 'Win32'),
+        ('Macintosh', 'macOS', 'MacIntel'),
+        ('X11', 'Linux', 'Linux x86_64'),
+        ('Linux', 'Linux', 'Linux x86_64'),
+    ]
+
+    def __init__(self, profiles: List[FingerprintProfile]):
+        if not profiles:
+            raise ValueError("Pool de fingerprints vazio")
+        self.profiles = profiles
+
+    @classmethod
+    def profile_from_user_agent(cls, user_agent: str) -> Optional[FingerprintProfile]:
+        """Criar perfil coerente a partir de um UA (None se não for Chromium desktop)"""
+        # O engine usa Chromium: UAs de Firefox/Safari gerariam headers incoerentes
+        if 'Firefox/' in user_agent or 'Mobile' in user_agent:
+            return None
+
+        chrome_match = re.search(r'Chrome/(\d+)', user_agent)
+        if not chrome_match:
+            return None
+
+        os_info = next((info for info in cls.PLATFORMS if info[0] in user_agent), None)
+        if not os_info:
+            return None
+
+        _, ch_platform, nav_platform = os_info
+        version = chrome_match.group(1)
+
+        edge_match = re.search(r'Edg/(\d+)', user_agent)
+        if edge_match:
+            brand = f'"Microsoft Edge";v="{edge_match.group(1)}"'
+        else:
+            brand = f'"Google Chrome";v="{version}"'
+
+        width, height = random.choice(cls.VIEWPORTS[ch_platform])
+
+        return FingerprintProfile(
+            user_agent=user_agent,
+            platform=nav_platform,
+            viewport={'width': width, 'height': height},
+            sec_ch_ua=f'"Not_A Brand";v="8", "Chromium";v="{version}", {brand}',
+            sec_ch_ua_platform=f'"{ch_platform}"',
+        )
+
+    @classmethod
+    def build(cls, size: int = 24) -> "FingerprintPool":
+        """Construir pool novo (consulta fake_useragent uma única vez)"""
+        user_agents = list(ScraperConfig.USER_AGENTS)
+
+        try:
+            from fake_useragent import UserAgent
+            ua = UserAgent(browsers=['chrome', 'edge'])
+            user_agents.extend(ua.random for _ in range(size * 2))
+        except Exception:
+            pass  # Pool funciona apenas com os UAs fixos da configuração
+
+        profiles = []
+        seen = set()
+        for user_agent in user_agents:
+            if user_agent in seen:
+                continue
+            seen.add(user_agent)
+
+            profile = cls.profile_from_user_agent(user_agent)
+            if profile:
+                profiles.append(profile)
+            if len(profiles) >= size:
+                break
+
+        return cls(profiles)
+
+    @classmethod
+    def load(cls, path: Path) -> "FingerprintPool":
+        """Carregar pool salvo em disco"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Versão de pool incompatível: {data.get('version')}")
+
+        return cls([FingerprintProfile(**profile) for profile in data['profiles']])
+
+    def save(self, path: Path) -> None:
+        """Persistir pool em disco"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': self.VERSION,
+            'profiles': [asdict(profile) for profile in self.profiles]
+        }
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load_or_build(cls, path: Path, size: int = 24) -> "FingerprintPool":
+        """Carregar pool do disco ou construir e salvar um novo"""
+        try:
+            return cls.load(path)
+        except (FileNotFoundError, ValueError, KeyError, TypeError, json.JSONDecodeError):
+            pass
+
+        pool = cls.build(size)
+        try:
+            pool.save(path)
+        except OSError as e:
+            print(f"⚠️ Erro ao salvar pool de fingerprints: {e}")
+        return pool
+
+    def random(self) -> FingerprintProfile:
+        """Sortear um perfil do pool"""
+        return random.choice(self.profiles)
+
+    def stable(self) -> FingerprintProfile:
+        """Perfil fixo entre execuções (sessões com cookies persistentes)"""
+        return self.profiles[0]
+
+_pool: Optional[FingerprintPool] = None
+_pool_lock = threading.Lock()
+
+def get_fingerprint_pool() -> FingerprintPool:
+    """Pool compartilhado do processo, carregado na primeira chamada"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = FingerprintPool.load_or_build(
+                    Path(ScraperConfig.FINGERPRINT_POOL_FILE),
+                    ScraperConfig.FINGERPRINT_POOL_SIZE
+                )
+    return _pool
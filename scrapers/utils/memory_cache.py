@@ -0,0 +1,123 @@
+"""
+Camada LRU em memória na frente do cache SQLite
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..config import ScraperConfig
+
+class MemoryLRU:
+    """LRU limitado por número de entradas e por bytes, com TTL por entrada.
+
+    Guarda valores bytes (o blob codificado), então o tamanho é exato e quem lê
+    recebe sempre uma cópia nova dos produtos. Seguro entre threads: cada busca
+    da GUI roda numa thread com seu próprio event loop.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Valor ainda válido (marcado como usado recentemente) ou None"""
+        entry = self.get_with_age(key)
+        return entry[0] if entry else None
+
+    def get_with_age(self, key: Hashable) -> Optional[Tuple[bytes, float]]:
+        """(valor, idade em segundos) ainda válido ou None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, stored_at, value = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, now - stored_at
+
+    def put(self, key: Hashable, value: bytes, ttl: Optional[float] = None, age: float = 0.0) -> None:
+        """Inserir/substituir e despejar as entradas menos usadas se preciso
+        (age: idade que o valor já tinha, ex. ao promover do SQLite)"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            now = time.monotonic()
+            self._entries[key] = (now + ttl, now - age, value)
+            self._bytes += len(value)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """Remover entrada, se existir"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Esvaziar o cache (contadores são mantidos)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores e ocupação atual"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+_search_lru: Optional[MemoryLRU] = None
+_search_lru_lock = threading.Lock()
+
+def get_search_lru() -> MemoryLRU:
+    """LRU de buscas compartilhado por todas as instâncias do processo"""
+    global _search_lru
+
+    if _search_lru is None:
+        with _search_lru_lock:
+            if _search_lru is None:
+                _search_lru = MemoryLRU(
+                    ScraperConfig.MAX_CACHE_SIZE,
+                    ScraperConfig.MAX_CACHE_BYTES,
+                    ScraperConfig.CACHE_TTL
+                )
+    return _search_lru
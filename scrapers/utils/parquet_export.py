@@ -0,0 +1,187 @@
+"""
+Exportação do histórico de preços e do catálogo para Parquet (Arrow),
+em lotes de tamanho fixo e particionada por data (date=AAAA-MM-DD)
+"""
+
+import itertools
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import ScraperConfig
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; só a exportação depende dele
+    pa = pq = None
+
+# Linhas completas (modo 'full') e pontos de mudança (modo 'changes') saem com
+# as mesmas colunas; cada origem grava seu próprio arquivo na partição
+HISTORY_QUERIES = {
+    'full': """
+        SELECT product_id, name, price, original_price, url, scraped_at
+        FROM product_history
+        WHERE scraped_at >= ?
+        ORDER BY scraped_at
+    """,
+    'changes': """
+        SELECT p.product_id, i.name, p.price, p.original_price, i.url, p.observed_at
+        FROM price_points p LEFT JOIN product_info i ON i.product_id = p.product_id
+        WHERE p.observed_at >= ?
+        ORDER BY p.observed_at
+    """,
+}
+
+CATALOG_QUERY = """
+    SELECT product_id, name, price, original_price, discount_percentage, category,
+           image_url, url, affiliate_url, first_seen, last_seen
+    FROM products
+    ORDER BY product_id
+"""
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("pyarrow não instalado.\nInstale com: pip install pyarrow")
+
+def _history_schema():
+    return pa.schema([
+        ('product_id', pa.string()),
+        ('name', pa.string()),
+        ('price', pa.float64()),
+        ('original_price', pa.float64()),
+        ('url', pa.string()),
+        ('observed_at', pa.timestamp('ms')),
+    ])
+
+def _catalog_schema():
+    return pa.schema([
+        ('product_id', pa.string()),
+        ('name', pa.string()),
+        ('price', pa.float64()),
+        ('original_price', pa.float64()),
+        ('discount_percentage', pa.float64()),
+        ('category', pa.string()),
+        ('image_url', pa.string()),
+        ('url', pa.string()),
+        ('affiliate_url', pa.string()),
+        ('first_seen', pa.timestamp('ms')),
+        ('last_seen', pa.timestamp('ms')),
+    ])
+
+def _record_batch(rows: List[Tuple], schema) -> "pa.RecordBatch":
+    """Linhas do SQLite -> RecordBatch (datas em texto UTC convertidas pelo Arrow)"""
+    arrays = []
+    for values, field in zip(zip(*rows), schema):
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(values, type=pa.string()).cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _chunks(conn: sqlite3.Connection, query: str, params: Tuple, size: int) -> Iterator[List[Tuple]]:
+    """Cursor lido em blocos de `size` linhas (memória limitada)"""
+    cursor = conn.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+# Tabelas lidas pela exportação (criadas pelas migrações do ScraperCache)
+REQUIRED_TABLES = ('product_history', 'price_points', 'product_info', 'products')
+
+def _open_readonly(db_path: Path) -> sqlite3.Connection:
+    if not db_path.exists():
+        raise FileNotFoundError(f"Cache não encontrado: {db_path}")
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+def _check_schema(conn: sqlite3.Connection) -> None:
+    """Falhar antes de gravar qualquer arquivo se o cache ainda não foi migrado"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [table for table in REQUIRED_TABLES if table not in existing]
+    if missing:
+        raise RuntimeError(
+            f"Cache sem as tabelas {', '.join(missing)} (schema antigo).\n"
+            f"Rode o scraper uma vez para migrar o cache e exporte novamente."
+        )
+
+def export_history(conn: sqlite3.Connection, output_dir: Path, since: Optional[str] = None,
+                   chunk_rows: Optional[int] = None) -> Dict[str, int]:
+    """Gravar history/date=AAAA-MM-DD/part-<origem>.parquet (um writer aberto por vez)"""
+    chunk_rows = chunk_rows or ScraperConfig.PARQUET_CHUNK_ROWS
+    schema = _history_schema()
+    report = {'rows': 0, 'files': 0}
+
+    for source, query in HISTORY_QUERIES.items():
+        writer, current_date = None, None
+        try:
+            for rows in _chunks(conn, query, (since or '',), chunk_rows):
+                # As linhas chegam ordenadas por data: cada grupo fecha ou continua uma partição
+                for date, group in itertools.groupby(rows, key=lambda row: row[5][:10]):
+                    if date != current_date:
+                        if writer is not None:
+                            writer.close()
+                        partition = output_dir / 'history' / f"date={date}"
+                        partition.mkdir(parents=True, exist_ok=True)
+                        writer = pq.ParquetWriter(partition / f"part-{source}.parquet", schema,
+                                                  compression=ScraperConfig.PARQUET_COMPRESSION)
+                        current_date = date
+                        report['files'] += 1
+
+                    group = list(group)
+                    writer.write_batch(_record_batch(group, schema))
+                    report['rows'] += len(group)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return report
+
+def export_catalog(conn: sqlite3.Connection, output_dir: Path, chunk_rows: Optional[int] = None) -> Dict[str, int]:
+    """Gravar catalog/snapshot=AAAA-MM-DD/products.parquet com o estado atual"""
+    chunk_rows = chunk_rows or ScraperConfig.PARQUET_CHUNK_ROWS
+    schema = _catalog_schema()
+    partition = output_dir / 'catalog' / f"snapshot={datetime.now(timezone.utc):%Y-%m-%d}"
+    partition.mkdir(parents=True, exist_ok=True)
+
+    report = {'rows': 0, 'files': 1}
+    with pq.ParquetWriter(partition / "products.parquet", schema,
+                          compression=ScraperConfig.PARQUET_COMPRESSION) as writer:
+        for rows in _chunks(conn, CATALOG_QUERY, (), chunk_rows):
+            writer.write_batch(_record_batch(rows, schema))
+            report['rows'] += len(rows)
+    return report
+
+def export_parquet(db_path: str = "cache/scraper_cache.db", output_dir: Optional[str] = None,
+                   since: Optional[str] = None, chunk_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Exportar histórico (a partir de `since`, 'AAAA-MM-DD') e catálogo para Parquet.
+
+    Partições já existentes são regravadas, então repetir a exportação é seguro.
+    """
+    _require_pyarrow()
+    output = Path(output_dir or ScraperConfig.PARQUET_EXPORT_DIR)
+    started = time.perf_counter()
+
+    conn = _open_readonly(Path(db_path))
+    try:
+        _check_schema(conn)
+        report = {
+            'history': export_history(conn, output, since, chunk_rows),
+            'catalog': export_catalog(conn, output, chunk_rows),
+        }
+    except sqlite3.OperationalError as e:
+        raise RuntimeError(f"Erro ao ler o cache {db_path}: {e}") from e
+    finally:
+        conn.close()
+
+    report['output_dir'] = str(output)
+    report['bytes'] = sum(path.stat().st_size for path in output.rglob('*.parquet'))
+    report['seconds'] = round(time.perf_counter() - started, 3)
+
+    print(f"📦 Parquet exportado em {output}: {report['history']['rows']} linhas de histórico "
+          f"({report['history']['files']} arquivos), {report['catalog']['rows']} produtos no catálogo, "
+          f"{report['bytes'] / 1024 / 1024:.1f} MB em {report['seconds']:.1f}s")
+    return report
@@ -0,0 +1,228 @@
+"""
+Contêiner colunar compacto para muitos produtos (resultados acumulados da GUI)
+"""
+
+import math
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .validators import Product
+
+# Colunas por tipo; a união é exatamente Product.model_fields, então as
+# views saem pelo caminho rápido de Product.from_trusted
+FLOAT_FIELDS = ('price', 'original_price', 'discount_percentage', 'rating', 'category_confidence')
+STRING_FIELDS = ('name', 'url', 'image_url', 'seller', 'product_id')
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NAN = float('nan')
+
+class _StringColumn:
+    """Textos concatenados em UTF-8 com deslocamentos (offsets) por linha"""
+
+    __slots__ = ('data', 'offsets', 'nulls')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('Q', [0])
+        self.nulls = bytearray()
+
+    def append(self, encoded: Optional[bytes]) -> None:
+        """Texto já codificado em UTF-8 (None = valor ausente)"""
+        if encoded is not None:
+            self.data += encoded
+        self.offsets.append(len(self.data))
+        self.nulls.append(encoded is None)
+
+    def get(self, row: int) -> Optional[str]:
+        if self.nulls[row]:
+            return None
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode('utf-8')
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets) + len(self.nulls)
+
+class ProductTable:
+    """Produtos guardados em arrays paralelos tipados, sem um objeto por produto.
+
+    Preços e demais números ficam em float64 (None vira NaN), categorias
+    internadas num dicionário com código por linha, textos num bloco UTF-8
+    com offsets e a data de coleta em microssegundos (int64). Iterar ou
+    indexar devolve Products montados sob demanda (cópias: alterar a view
+    não altera a tabela). Assim como uma lista, não é protegido entre threads:
+    a GUI só altera a tabela na thread do Tk.
+    """
+
+    def __init__(self, products: Iterable["Product"] = ()):
+        self._floats: Dict[str, array] = {name: array('d') for name in FLOAT_FIELDS}
+        self._strings: Dict[str, _StringColumn] = {name: _StringColumn() for name in STRING_FIELDS}
+        self._flags = array('B')  # bit 0: is_promotion, bit 1: free_shipping
+        self._reviews = array('q')  # -1 = sem avaliações informadas
+        self._scraped_at = array('q')
+        self._category_codes = array('I')
+        self._categories: List[Optional[str]] = [None]  # código 0 = sem categoria
+        self._category_index: Dict[Optional[str], int] = {None: 0}
+        self.extend(products)
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    def __iter__(self) -> Iterator["Product"]:
+        return self._views(range(len(self)))
+
+    def __getitem__(self, row: int) -> "Product":
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("índice de produto fora da tabela")
+        return next(self._views((row,)))
+
+    def append(self, product: "Product") -> None:
+        """Copiar os campos do produto para as colunas.
+
+        Todas as conversões que podem falhar acontecem antes de gravar a
+        primeira coluna: um produto inválido não deixa linha pela metade.
+        """
+        floats = []
+        for name in FLOAT_FIELDS:
+            value = getattr(product, name)
+            floats.append(_NAN if value is None else float(value))
+        strings = []
+        for name in STRING_FIELDS:
+            value = getattr(product, name)
+            strings.append(None if value is None else value.encode('utf-8'))
+        flags = bool(product.is_promotion) | bool(product.free_shipping) << 1
+        reviews = -1 if product.reviews_count is None else int(product.reviews_count)
+        scraped_at = (_naive_utc(product.scraped_at) - _EPOCH) // _MICROSECOND
+
+        for column, value in zip(self._floats.values(), floats):
+            column.append(value)
+        for column, value in zip(self._strings.values(), strings):
+            column.append(value)
+        self._flags.append(flags)
+        self._reviews.append(reviews)
+        self._scraped_at.append(scraped_at)
+
+        code = self._category_index.get(product.category)
+        if code is None:
+            code = self._category_index[product.category] = len(self._categories)
+            self._categories.append(product.category)
+        self._category_codes.append(code)
+
+    def extend(self, products: Iterable["Product"]) -> None:
+        for product in products:
+            self.append(product)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def categories(self) -> List[str]:
+        """Categorias distintas presentes na tabela (ordem de chegada)"""
+        return self._categories[1:]
+
+    def filter(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+               category: Optional[str] = None) -> List[int]:
+        """Linhas que passam nos filtros da GUI, varrendo só as colunas necessárias.
+
+        Mesma regra de antes: produto sem preço passa nos filtros de preço e
+        limites vazios/zero são ignorados.
+        """
+        rows: Iterable[int] = range(len(self))
+
+        if category is not None:
+            code = self._category_index.get(category)
+            if code is None or code == 0:
+                return []
+            codes = self._category_codes
+            rows = [row for row in rows if codes[row] == code]
+
+        prices = self._floats['price']
+        if min_price:
+            # NaN < x é falso: produtos sem preço continuam na seleção
+            rows = [row for row in rows if not prices[row] < min_price]
+        if max_price:
+            rows = [row for row in rows if not prices[row] > max_price]
+
+        return list(rows)
+
+    def take(self, rows: Iterable[int]) -> List["Product"]:
+        """Products das linhas indicadas (ex.: resultado de filter)"""
+        return list(self._views(rows))
+
+    def select(self, fields: Sequence[str], rows: Optional[Iterable[int]] = None) -> Iterator[Tuple[Any, ...]]:
+        """Tuplas só com os campos pedidos (de todas as linhas ou das indicadas),
+        lidas direto das colunas sem montar Product: para telas e exportações"""
+        getters = [self._getter(name) for name in fields]
+        for row in range(len(self)) if rows is None else rows:
+            yield tuple([get(row) for get in getters])
+
+    def nbytes(self) -> int:
+        """Memória aproximada ocupada pelas colunas"""
+        columns = [*self._floats.values(), self._flags, self._reviews, self._scraped_at, self._category_codes]
+        return (sum(column.itemsize * len(column) for column in columns)
+                + sum(column.nbytes() for column in self._strings.values()))
+
+    def _getter(self, name: str) -> Callable[[int], Any]:
+        """Função linha -> valor de um campo, como em Product"""
+        if name in self._strings:
+            return self._strings[name].get
+        if name in ('discount_percentage', 'category_confidence'):
+            return self._floats[name].__getitem__
+        if name in self._floats:
+            column = self._floats[name]
+            return lambda row: _optional(column[row])
+
+        flags, reviews, scraped_at = self._flags, self._reviews, self._scraped_at
+        categories, codes = self._categories, self._category_codes
+        getters = {
+            'category': lambda row: categories[codes[row]],
+            'is_promotion': lambda row: bool(flags[row] & 1),
+            'free_shipping': lambda row: bool(flags[row] & 2),
+            'reviews_count': lambda row: None if reviews[row] < 0 else reviews[row],
+            'scraped_at': lambda row: _EPOCH + timedelta(microseconds=scraped_at[row]),
+        }
+        if name not in getters:
+            raise KeyError(f"Campo desconhecido na tabela de produtos: {name}")
+        return getters[name]
+
+    def _views(self, rows: Iterable[int]) -> Iterator["Product"]:
+        """Products montados a partir das colunas (buscas feitas uma vez por lote)"""
+        from .validators import Product  # pydantic só é carregado quando alguém lê produtos
+
+        from_trusted = Product.from_trusted
+        names, urls, images, sellers, ids = (self._strings[name].get for name in STRING_FIELDS)
+        prices, originals, discounts, ratings, confidences = (self._floats[name] for name in FLOAT_FIELDS)
+        categories, codes = self._categories, self._category_codes
+
+        for row in rows:
+            flags = self._flags[row]
+            reviews = self._reviews[row]
+            # Na ordem de Product.model_fields
+            yield from_trusted({
+                'name': names(row),
+                'price': _optional(prices[row]),
+                'original_price': _optional(originals[row]),
+                'discount_percentage': discounts[row],
+                'url': urls(row),
+                'image_url': images(row),
+                'seller': sellers(row),
+                'rating': _optional(ratings[row]),
+                'reviews_count': None if reviews < 0 else reviews,
+                'is_promotion': bool(flags & 1),
+                'free_shipping': bool(flags & 2),
+                'product_id': ids(row),
+                'category': categories[codes[row]],
+                'category_confidence': confidences[row],
+                'scraped_at': _EPOCH + timedelta(microseconds=self._scraped_at[row]),
+            })
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+def _naive_utc(value: datetime) -> datetime:
+    """Datas com fuso (ex.: coletado_em de arquivos carregados) viram UTC sem fuso"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,103 @@
+"""
+Profiler por amostragem de pilhas com saída em formato "folded"
+(compatível com flamegraph.pl, speedscope.app e inferno)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+class SamplingProfiler:
+    """Amostra periodicamente a pilha de uma thread a partir de uma thread de fundo"""
+
+    def __init__(self, output_path: str, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.output_path = Path(output_path)
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._elapsed = 0.0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        """Nome legível do frame: função (arquivo:linha de definição)"""
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _collapse(self, frame) -> str:
+        """Pilha da raiz até o frame atual, separada por ';'"""
+        labels = []
+        while frame is not None:
+            labels.append(self._frame_label(frame))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def _run(self) -> None:
+        """Loop da thread de amostragem"""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[self._collapse(frame)] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        """Iniciar amostragem (por padrão da thread que chamou start)"""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+
+        self._stop.clear()
+        self._started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> Path:
+        """Parar amostragem, gravar relatório e mostrar as funções mais quentes"""
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        self._elapsed = time.perf_counter() - self._started_at
+
+        self.save()
+        print(f"🔥 Profile salvo em: {self.output_path} ({self.samples} amostras em {self._elapsed:.1f}s)")
+        print(self.format_hotspots())
+        return self.output_path
+
+    def save(self) -> None:
+        """Gravar pilhas no formato folded ("pilha;da;raiz contagem")"""
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def format_hotspots(self, top: int = 10) -> str:
+        """Funções com mais tempo próprio (frame do topo da pilha)"""
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(';', 1)[-1]] += count
+
+        lines = [f"   Top {top} funções (tempo próprio):"]
+        for label, count in own.most_common(top):
+            share = count / self.samples * 100 if self.samples else 0
+            lines.append(f"   {share:5.1f}%  {label}")
+        return "\n".join(lines)
+
+def profile_output_path(kind: str, data_dir: str = "data") -> str:
+    """Caminho do relatório ao lado das saídas em data/"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(data_dir, "profiles", f"profile_{kind}_{timestamp}.folded")
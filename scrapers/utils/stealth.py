@@ -3,58 +3,90 @@ Utilitários para evitar detecção de bot
 """
 
 import asyncio
+import json
 import random
-from typing import Any
-from playwright.async_api import Page, Browser
+from typing import Any, Dict, Optional
+from playwright.async_api import Page, Browser, BrowserContext
+
+from .fingerprints import FingerprintProfile, get_fingerprint_pool
+
+# Script executado antes de qualquer script da página
+STEALTH_INIT_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+    
+    // Mascarar Chrome automation
+    window.chrome = {
+        runtime: {},
+    };
+    
+    // Simular plugins reais
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5],
+    });
+    
+    // Simular idiomas
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['pt-BR', 'pt', 'en'],
+    });
+    
+    // Mascarar permissões
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Notification.permission }) :
+            originalQuery(parameters)
+    );
+"""
+
+STEALTH_EXTRA_HEADERS = {
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+}
 
 class StealthMode:
     """Classe para implementar funcionalidades stealth"""
     
     @staticmethod
-    async def setup_stealth(page: Page) -> None:
-        """Configura a página para modo stealth"""
+    def build_init_script(profile: FingerprintProfile) -> str:
+        """Script stealth completo com a plataforma coerente com o perfil"""
+        platform_script = (
+            f"Object.defineProperty(navigator, 'platform', {{get: () => {json.dumps(profile.platform)}}});"
+        )
+        return platform_script + STEALTH_INIT_SCRIPT
+    
+    @staticmethod
+    def context_options(profile: FingerprintProfile) -> Dict[str, Any]:
+        """Opções de new_context() para um contexto stealth com o perfil dado"""
+        from ..config import ScraperConfig
         
-        # Remover indicadores de webdriver
-        await page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-            
-            // Mascarar Chrome automation
-            window.chrome = {
-                runtime: {},
-            };
-            
-            // Simular plugins reais
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5],
-            });
-            
-            // Simular idiomas
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['pt-BR', 'pt', 'en'],
-            });
-            
-            // Mascarar permissões
-            const originalQuery = window.navigator.permissions.query;
-            return window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-        """)
+        return {
+            'user_agent': profile.user_agent,
+            'viewport': profile.viewport,
+            'locale': 'pt-BR',
+            'timezone_id': 'America/Sao_Paulo',
+            'extra_http_headers': ScraperConfig.get_stealth_headers(profile),
+        }
+    
+    @staticmethod
+    async def setup_context_stealth(context: BrowserContext, profile: FingerprintProfile) -> None:
+        """Instala o modo stealth uma vez no contexto - vale para todas as abas"""
+        await context.add_init_script(StealthMode.build_init_script(profile))
+    
+    @staticmethod
+    async def setup_stealth(page: Page, profile: Optional[FingerprintProfile] = None) -> None:
+        """Configura uma página avulsa para modo stealth"""
+        if profile is None:
+            profile = get_fingerprint_pool().random()
+        
+        await page.add_init_script(StealthMode.build_init_script(profile))
         
-        # Configurar viewport realista
-        await page.set_viewport_size({
-            "width": random.randint(1200, 1920), 
-            "height": random.randint(800, 1080)
-        })
+        # Viewport do perfil (resolução real do sistema do UA)
+        await page.set_viewport_size(profile.viewport)
         
         # Headers extras
-        await page.set_extra_http_headers({
-            'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-        })
+        await page.set_extra_http_headers(STEALTH_EXTRA_HEADERS)
     
     @staticmethod
     async def human_like_delay(min_seconds: float = 0.5, max_seconds: float = 2.0) -> None:
@@ -0,0 +1,106 @@
+"""
+Medição de tempo por fase das buscas (navegação, esperas, parse, extração)
+"""
+
+import asyncio
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+# Ordem de exibição das fases conhecidas
+PHASES = [
+    'cache',         # Consulta ao cache de buscas
+    'goto',          # page.goto()
+    'sleep',         # Esperas fixas nossas (asyncio.sleep)
+    'cloudflare',    # Verificação de challenge do Cloudflare
+    'load_state',    # Espera de networkidle/readyState
+    'content',       # page.content()
+    'parse',         # BeautifulSoup + seleção dos cards
+    'card',          # Extração de um card (sem o enriquecimento)
+    'enrichment',    # Visita à página do produto para categoria
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por nearest-rank (values não precisa estar ordenado)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class PhaseTimer:
+    """Acumula amostras de duração por fase"""
+
+    def __init__(self, parent: Optional["PhaseTimer"] = None):
+        self.parent = parent
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.started_at = time.perf_counter()
+
+    def reset(self) -> None:
+        """Descartar amostras e reiniciar o relógio"""
+        self.samples.clear()
+        self.started_at = time.perf_counter()
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Registrar uma amostra (propaga para o timer pai)"""
+        self.samples[phase].append(seconds)
+        if self.parent:
+            self.parent.record(phase, seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Medir o bloco como uma amostra da fase (funciona em volta de awaits)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    async def sleep(self, seconds: float) -> None:
+        """asyncio.sleep contabilizado como espera fixa"""
+        with self.phase('sleep'):
+            await asyncio.sleep(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo com contagem, total, p50 e p95 por fase"""
+        names = [p for p in PHASES if p in self.samples]
+        names += sorted(p for p in self.samples if p not in PHASES)
+
+        phases = {}
+        for name in names:
+            values = self.samples[name]
+            phases[name] = {
+                'count': len(values),
+                'total': round(sum(values), 4),
+                'p50': round(percentile(values, 50), 4),
+                'p95': round(percentile(values, 95), 4),
+            }
+
+        return {
+            'wall_time': round(time.perf_counter() - self.started_at, 4),
+            'phases': phases,
+        }
+
+    @staticmethod
+    def format_status(summary: Dict[str, Any], top: int = 4) -> str:
+        """Linha curta para a barra de status (fases com maior tempo total)"""
+        phases = summary.get('phases', {})
+        if not phases:
+            return ""
+
+        biggest = sorted(phases.items(), key=lambda item: item[1]['total'], reverse=True)[:top]
+        parts = [f"{name} {data['total']:.1f}s" for name, data in biggest]
+        return f"⏱️ {summary.get('wall_time', 0):.1f}s: " + " · ".join(parts)
+
+    @staticmethod
+    def format_report(summary: Dict[str, Any]) -> str:
+        """Tabela com todas as fases para o console"""
+        lines = [f"⏱️ Tempo por fase (total {summary.get('wall_time', 0):.2f}s)"]
+        for name, data in summary.get('phases', {}).items():
+            lines.append(
+                f"   {name:<12} n={data['count']:<4} total={data['total']:8.2f}s "
+                f"p50={data['p50'] * 1000:8.1f}ms p95={data['p95'] * 1000:8.1f}ms"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,188 @@
+"""
+Tracer opcional de spans do crawl no formato Chrome Trace Event
+(abre em https://ui.perfetto.dev ou chrome://tracing)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+class Span:
+    """Intervalo aberto; registrado no tracer ao chamar end()"""
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.tid = tracer._current_tid()
+        self.start = time.perf_counter()
+        self.ended = False
+
+    def set(self, **args) -> None:
+        """Adicionar atributos ao span"""
+        self.args.update(args)
+
+    def end(self, **args) -> None:
+        """Fechar o span (chamadas repetidas são ignoradas)"""
+        if self.ended:
+            return
+        self.ended = True
+        self.args.update(args)
+        self.tracer._add_complete(self)
+
+class Tracer:
+    """Coleta spans com timestamps e grava JSON de trace do Chrome"""
+
+    enabled = True
+
+    def __init__(self, output_path: Optional[str] = None):
+        self.output_path = Path(output_path) if output_path else None
+        self.events: List[Dict[str, Any]] = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._tids: Dict[Any, int] = {}
+
+    def _timestamp(self, moment: float) -> float:
+        """Microssegundos desde o início do tracer"""
+        return round((moment - self._origin) * 1_000_000, 1)
+
+    def _current_tid(self) -> int:
+        """Uma trilha por task asyncio (ou thread), para visualizar concorrência"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+
+        key = (threading.get_ident(), id(task) if task else None)
+        with self._lock:
+            tid = self._tids.get(key)
+            if tid is None:
+                tid = len(self._tids) + 1
+                self._tids[key] = tid
+                track = task.get_name() if task else threading.current_thread().name
+                self.events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                    'args': {'name': track}
+                })
+        return tid
+
+    def _add_complete(self, span: Span) -> None:
+        """Registrar evento completo ('X') do span"""
+        end = time.perf_counter()
+        event = {
+            'name': span.name,
+            'cat': span.cat,
+            'ph': 'X',
+            'ts': self._timestamp(span.start),
+            'dur': round((end - span.start) * 1_000_000, 1),
+            'pid': self.pid,
+            'tid': span.tid,
+            'args': {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)
+                     for key, value in span.args.items()}
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def start_span(self, name: str, cat: str = 'crawl', **args) -> Span:
+        """Abrir span manualmente (fechar com span.end())"""
+        return Span(self, name, cat, args)
+
+    @contextmanager
+    def span(self, name: str, cat: str = 'crawl', **args):
+        """Span em volta de um bloco (funciona em volta de awaits)"""
+        span = self.start_span(name, cat, **args)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=repr(e))
+            raise
+        finally:
+            span.end()
+
+    def instant(self, name: str, cat: str = 'crawl', **args) -> None:
+        """Marcar um evento pontual"""
+        tid = self._current_tid()
+        with self._lock:
+            self.events.append({
+                'name': name, 'cat': cat, 'ph': 'i', 's': 't',
+                'ts': self._timestamp(time.perf_counter()),
+                'pid': self.pid, 'tid': tid, 'args': args
+            })
+
+    def save(self, path: Optional[str] = None) -> Optional[Path]:
+        """Gravar trace JSON (por padrão no output_path do tracer)"""
+        target = Path(path) if path else self.output_path
+        if not target:
+            return None
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return target
+
+    def flush(self) -> None:
+        """Gravar trace atual no output_path, se configurado"""
+        try:
+            saved = self.save()
+            if saved:
+                print(f"🧭 Trace salvo em: {saved}")
+        except OSError as e:
+            print(f"⚠️ Erro ao salvar trace: {e}")
+
+class _NullSpan:
+    """Span sem efeito (tracing desativado)"""
+
+    def set(self, **args) -> None:
+        pass
+
+    def end(self, **args) -> None:
+        pass
+
+class NullTracer:
+    """Tracer desativado: mesma interface, custo praticamente zero"""
+
+    enabled = False
+    _span = _NullSpan()
+
+    def start_span(self, name: str, cat: str = 'crawl', **args) -> _NullSpan:
+        return self._span
+
+    @contextmanager
+    def span(self, name: str, cat: str = 'crawl', **args):
+        yield self._span
+
+    def instant(self, name: str, cat: str = 'crawl', **args) -> None:
+        pass
+
+    def save(self, path: Optional[str] = None) -> None:
+        return None
+
+    def flush(self) -> None:
+        pass
+
+_tracer = NullTracer()
+
+def get_tracer():
+    """Tracer ativo do processo (NullTracer se o tracing estiver desligado)"""
+    return _tracer
+
+def enable_tracing(output_path: str) -> Tracer:
+    """Ativar tracing global gravando em output_path"""
+    global _tracer
+    _tracer = Tracer(output_path)
+    return _tracer
+
+def disable_tracing() -> None:
+    """Desativar tracing global"""
+    global _tracer
+    _tracer = NullTracer()
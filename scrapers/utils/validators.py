@@ -3,10 +3,12 @@ Validadores e processadores de dados
 """
 
 import re
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, validator, Field
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+from pydantic import BaseModel, ValidationError, validator, Field
 from datetime import datetime
 
+from .canonical import product_id_from_url
+
 class Product(BaseModel):
     """Modelo de produto com validação"""
     
@@ -66,6 +68,29 @@ class Product(BaseModel):
         if v and not v.startswith(('http://', 'https://')):
             v = f"https://www.mercadolivre.com.br{v}"
         return v
+    
+    @classmethod
+    def from_trusted(cls, values: Dict[str, Any]) -> 'Product':
+        """Produto a partir de dados já validados (cache, exportações próprias),
+        sem rodar os validadores (model_construct; values é copiado)"""
+        fields = cls.model_fields
+        if not values.keys() <= fields.keys():
+            # Extras são descartados; campos faltando recebem o padrão do modelo
+            values = {name: value for name, value in values.items() if name in fields}
+        return cls.model_construct(**values)
+    
+    @classmethod
+    def validate_many(cls, rows: Iterable[Dict[str, Any]]) -> Tuple[List['Product'], List[Tuple[int, str]]]:
+        """Validar vários registros de uma vez: (produtos válidos, [(índice, erro)])"""
+        products, errors = [], []
+        for index, row in enumerate(rows):
+            try:
+                products.append(cls.model_validate(row))
+            except ValidationError as e:
+                errors.append((index, "; ".join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                )))
+        return products, errors
 
 class DataProcessor:
     """Processador de dados extraídos"""
@@ -140,6 +165,11 @@ class DataProcessor:
         if not url:
             return None
         
+        # Forma canônica (MLB123..., também a partir de MLB-123...)
+        product_id = product_id_from_url(url)
+        if product_id:
+            return product_id
+        
         # Padrões comuns de ID do ML
         patterns = [
             r'ML[AB]\d+',  # MLB123456789 ou MLA123456789